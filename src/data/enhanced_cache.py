@@ -1,9 +1,14 @@
+import atexit
+import heapq
+import logging
+import os
+import pickle
+import sys
 import time
-import hashlib
-import json
+from collections import Counter, OrderedDict
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 
 from src.data.models import (
@@ -16,6 +21,23 @@ from src.data.models import (
 )
 
 
+logger = logging.getLogger(__name__)
+
+
+# Canonical data-type keys, interned so every cache op hashes the same string
+# object and dict lookups hit the pointer-equality fast path
+PRICES = sys.intern('prices')
+FINANCIAL_METRICS = sys.intern('financial_metrics')
+COMPANY_NEWS = sys.intern('company_news')
+INSIDER_TRADES = sys.intern('insider_trades')
+LINE_ITEMS = sys.intern('line_items')
+COMPANY_FACTS = sys.intern('company_facts')
+MARKET_CAP = sys.intern('market_cap')
+
+# Default TTL when a data type has no specific configuration
+DEFAULT_TTL_SECONDS = 3600
+
+
 class CacheEntryStatus(Enum):
     """Status of cache entries."""
     FRESH = "fresh"
@@ -23,36 +45,53 @@ class CacheEntryStatus(Enum):
     EXPIRED = "expired"
 
 
-@dataclass
+@dataclass(slots=True)
 class CacheEntry:
     """Represents a cached data entry with metadata."""
     data: Any
     provider: str
     timestamp: datetime
-    cache_key: str
+    cache_key: Tuple
     data_type: str
     ttl_seconds: int = 3600  # 1 hour default TTL
-    
+    _stale_at: float = field(init=False, repr=False)
+    _expires_at: float = field(init=False, repr=False)
+
+    def __post_init__(self):
+        # Precompute staleness thresholds once so each status check is just
+        # float comparisons instead of datetime arithmetic. Thresholds are on
+        # the monotonic clock so NTP steps can't expire or resurrect entries.
+        created = time.monotonic()
+        self._stale_at = created + self.ttl_seconds * 0.8  # 80% of TTL
+        self._expires_at = created + self.ttl_seconds
+
     @property
     def age(self) -> timedelta:
         """Get age of the cache entry."""
         return datetime.now() - self.timestamp
-    
-    @property
-    def status(self) -> CacheEntryStatus:
-        """Get status of the cache entry."""
-        age_seconds = self.age.total_seconds()
-        if age_seconds < self.ttl_seconds * 0.8:  # 80% of TTL
+
+    def status_at(self, now: float) -> CacheEntryStatus:
+        """Get status of the cache entry at a caller-supplied monotonic timestamp.
+
+        Taking `now` as an argument lets callers compute validity and status
+        from a single clock read instead of one per property access.
+        """
+        if now < self._stale_at:
             return CacheEntryStatus.FRESH
-        elif age_seconds < self.ttl_seconds:
+        elif now < self._expires_at:
             return CacheEntryStatus.STALE
         else:
             return CacheEntryStatus.EXPIRED
-    
+
+    @property
+    def status(self) -> CacheEntryStatus:
+        """Get status of the cache entry."""
+        return self.status_at(time.monotonic())
+
     @property
     def is_valid(self) -> bool:
         """Check if cache entry is still valid (not expired)."""
-        return self.status != CacheEntryStatus.EXPIRED
+        return time.monotonic() < self._expires_at
 
 
 class ProviderAwareCache:
@@ -61,18 +100,23 @@ class ProviderAwareCache:
     intelligent cache management with TTL and provider preference.
     """
     
-    def __init__(self):
-        self._cache: Dict[str, CacheEntry] = {}
-        
+    def __init__(self, max_entries: int = 10000):
+        # Ordered by recency of use so eviction is O(1) LRU
+        self._cache: "OrderedDict[Tuple, CacheEntry]" = OrderedDict()
+        self._max_entries = max_entries
+
+        # Min-heap of (expires_at, cache_key) for opportunistic expiry sweeps
+        self._expiry_heap: List[Tuple[float, Tuple]] = []
+
         # TTL configurations by data type (in seconds)
         self._ttl_config = {
-            'prices': 300,          # 5 minutes for price data
-            'financial_metrics': 3600,  # 1 hour for financial metrics
-            'company_news': 1800,   # 30 minutes for news
-            'insider_trades': 7200, # 2 hours for insider trades
-            'line_items': 3600,     # 1 hour for line items
-            'company_facts': 86400, # 24 hours for company facts
-            'market_cap': 1800,     # 30 minutes for market cap
+            PRICES: 300,            # 5 minutes for price data
+            FINANCIAL_METRICS: 3600,  # 1 hour for financial metrics
+            COMPANY_NEWS: 1800,     # 30 minutes for news
+            INSIDER_TRADES: 7200,   # 2 hours for insider trades
+            LINE_ITEMS: 3600,       # 1 hour for line items
+            COMPANY_FACTS: 86400,   # 24 hours for company facts
+            MARKET_CAP: 1800,       # 30 minutes for market cap
         }
         
         # Provider preferences (higher score = preferred)
@@ -82,20 +126,30 @@ class ProviderAwareCache:
             'financialdatasets': 9,
         }
     
-    def _generate_cache_key(self, data_type: str, *args, **kwargs) -> str:
-        """Generate a unique cache key for the request."""
-        # Convert args and kwargs to a consistent string representation
-        key_data = {
-            'data_type': data_type,
-            'args': args,
-            'kwargs': sorted(kwargs.items())
-        }
-        key_string = json.dumps(key_data, sort_keys=True)
-        return hashlib.md5(key_string.encode()).hexdigest()
+    def _generate_cache_key(self, data_type: str, *args, **kwargs) -> Tuple:
+        """Generate a unique cache key for the request.
+
+        Plain tuples hash natively in dicts, so the key needs no
+        serialization at all - the former json.dumps(sort_keys=True) + MD5
+        step is gone entirely. If a stable string key is ever needed again
+        (e.g. cross-process persistence), derive it from repr() of this tuple
+        rather than reintroducing JSON encoding on the hot path.
+        """
+        return (data_type, args, tuple(sorted(kwargs.items())))
     
+    def _sweep_expired(self, now: float):
+        """Drop expired entries by popping the expiry heap - O(log N) per pop."""
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_at, cache_key = heapq.heappop(heap)
+            entry = self._cache.get(cache_key)
+            # Skip stale heap records for entries that were replaced or evicted
+            if entry is not None and entry._expires_at == expires_at:
+                del self._cache[cache_key]
+
     def _get_ttl(self, data_type: str) -> int:
         """Get TTL for a specific data type."""
-        return self._ttl_config.get(data_type, 3600)  # Default 1 hour
+        return self._ttl_config.get(data_type, DEFAULT_TTL_SECONDS)
     
     def get(
         self, 
@@ -110,18 +164,23 @@ class ProviderAwareCache:
             Tuple of (data, provider_name, cache_status) or None if not cached/expired
         """
         cache_key = self._generate_cache_key(data_type, *args, **kwargs)
-        
-        if cache_key not in self._cache:
+        now = time.monotonic()
+        self._sweep_expired(now)
+
+        # Single lookup + single status computation for the whole hit path
+        entry = self._cache.get(cache_key)
+        if entry is None:
             return None
-        
-        entry = self._cache[cache_key]
-        
+
+        status = entry.status_at(now)
+
         # Remove expired entries
-        if not entry.is_valid:
+        if status == CacheEntryStatus.EXPIRED:
             del self._cache[cache_key]
             return None
-        
-        return entry.data, entry.provider, entry.status
+
+        self._cache.move_to_end(cache_key)
+        return entry.data, entry.provider, status
     
     def set(
         self, 
@@ -142,15 +201,18 @@ class ProviderAwareCache:
         """
         cache_key = self._generate_cache_key(data_type, *args, **kwargs)
         ttl = self._get_ttl(data_type)
-        
-        # Check if we already have data from a preferred provider
-        if cache_key in self._cache:
-            existing_entry = self._cache[cache_key]
+        now = time.monotonic()
+        self._sweep_expired(now)
+
+        # Check if we already have data from a preferred provider before
+        # allocating a new entry - a single .get() lookup instead of `in` + []
+        existing_entry = self._cache.get(cache_key)
+        if existing_entry is not None:
             existing_score = self._provider_scores.get(existing_entry.provider, 0)
             new_score = self._provider_scores.get(provider, 0)
-            
+
             # Only replace if new provider is better or existing data is stale
-            if (existing_entry.status == CacheEntryStatus.FRESH and 
+            if (existing_entry.status_at(now) == CacheEntryStatus.FRESH and
                 new_score <= existing_score):
                 return  # Keep existing data
         
@@ -164,6 +226,12 @@ class ProviderAwareCache:
         )
         
         self._cache[cache_key] = entry
+        self._cache.move_to_end(cache_key)
+        heapq.heappush(self._expiry_heap, (entry._expires_at, cache_key))
+
+        # Bound memory: evict least recently used entries past capacity
+        while len(self._cache) > self._max_entries:
+            self._cache.popitem(last=False)
     
     def get_prices(
         self, 
@@ -172,7 +240,7 @@ class ProviderAwareCache:
         end_date: str
     ) -> Optional[Tuple[List[Price], str, CacheEntryStatus]]:
         """Get cached price data."""
-        return self.get('prices', ticker, start_date, end_date)
+        return self.get(PRICES, ticker, start_date, end_date)
     
     def set_prices(
         self, 
@@ -183,7 +251,7 @@ class ProviderAwareCache:
         provider: str
     ):
         """Cache price data."""
-        self.set('prices', prices, provider, ticker, start_date, end_date)
+        self.set(PRICES, prices, provider, ticker, start_date, end_date)
     
     def get_financial_metrics(
         self,
@@ -193,7 +261,7 @@ class ProviderAwareCache:
         limit: int = 10,
     ) -> Optional[Tuple[List[FinancialMetrics], str, CacheEntryStatus]]:
         """Get cached financial metrics."""
-        return self.get('financial_metrics', ticker, end_date, period, limit)
+        return self.get(FINANCIAL_METRICS, ticker, end_date, period, limit)
     
     def set_financial_metrics(
         self,
@@ -205,7 +273,7 @@ class ProviderAwareCache:
         provider: str,
     ):
         """Cache financial metrics."""
-        self.set('financial_metrics', metrics, provider, ticker, end_date, period, limit)
+        self.set(FINANCIAL_METRICS, metrics, provider, ticker, end_date, period, limit)
     
     def get_company_news(
         self,
@@ -215,7 +283,7 @@ class ProviderAwareCache:
         limit: int = 1000,
     ) -> Optional[Tuple[List[CompanyNews], str, CacheEntryStatus]]:
         """Get cached company news."""
-        return self.get('company_news', ticker, end_date, start_date, limit)
+        return self.get(COMPANY_NEWS, ticker, end_date, start_date, limit)
     
     def set_company_news(
         self,
@@ -227,7 +295,7 @@ class ProviderAwareCache:
         provider: str,
     ):
         """Cache company news."""
-        self.set('company_news', news, provider, ticker, end_date, start_date, limit)
+        self.set(COMPANY_NEWS, news, provider, ticker, end_date, start_date, limit)
     
     def get_insider_trades(
         self,
@@ -237,7 +305,7 @@ class ProviderAwareCache:
         limit: int = 1000,
     ) -> Optional[Tuple[List[InsiderTrade], str, CacheEntryStatus]]:
         """Get cached insider trades."""
-        return self.get('insider_trades', ticker, end_date, start_date, limit)
+        return self.get(INSIDER_TRADES, ticker, end_date, start_date, limit)
     
     def set_insider_trades(
         self,
@@ -249,7 +317,7 @@ class ProviderAwareCache:
         provider: str,
     ):
         """Cache insider trades."""
-        self.set('insider_trades', trades, provider, ticker, end_date, start_date, limit)
+        self.set(INSIDER_TRADES, trades, provider, ticker, end_date, start_date, limit)
     
     def search_line_items_cached(
         self,
@@ -260,9 +328,10 @@ class ProviderAwareCache:
         limit: int = 10,
     ) -> Optional[Tuple[List[LineItem], str, CacheEntryStatus]]:
         """Get cached line items."""
-        # Convert list to tuple for hashing
-        line_items_tuple = tuple(sorted(line_items))
-        return self.get('line_items', ticker, line_items_tuple, end_date, period, limit)
+        # frozenset is order-invariant by construction and hashes in O(n),
+        # so no sort is needed to canonicalize the request
+        line_items_key = frozenset(line_items)
+        return self.get(LINE_ITEMS, ticker, line_items_key, end_date, period, limit)
     
     def set_line_items(
         self,
@@ -275,15 +344,15 @@ class ProviderAwareCache:
         provider: str,
     ):
         """Cache line items."""
-        line_items_tuple = tuple(sorted(line_items))
-        self.set('line_items', items, provider, ticker, line_items_tuple, end_date, period, limit)
+        line_items_key = frozenset(line_items)
+        self.set(LINE_ITEMS, items, provider, ticker, line_items_key, end_date, period, limit)
     
     def get_company_facts(
         self, 
         ticker: str
     ) -> Optional[Tuple[Optional[CompanyFacts], str, CacheEntryStatus]]:
         """Get cached company facts."""
-        return self.get('company_facts', ticker)
+        return self.get(COMPANY_FACTS, ticker)
     
     def set_company_facts(
         self, 
@@ -292,7 +361,7 @@ class ProviderAwareCache:
         provider: str
     ):
         """Cache company facts."""
-        self.set('company_facts', facts, provider, ticker)
+        self.set(COMPANY_FACTS, facts, provider, ticker)
     
     def get_market_cap(
         self, 
@@ -300,7 +369,7 @@ class ProviderAwareCache:
         end_date: str
     ) -> Optional[Tuple[Optional[float], str, CacheEntryStatus]]:
         """Get cached market cap."""
-        return self.get('market_cap', ticker, end_date)
+        return self.get(MARKET_CAP, ticker, end_date)
     
     def set_market_cap(
         self, 
@@ -310,7 +379,7 @@ class ProviderAwareCache:
         provider: str
     ):
         """Cache market cap."""
-        self.set('market_cap', market_cap, provider, ticker, end_date)
+        self.set(MARKET_CAP, market_cap, provider, ticker, end_date)
     
     def clear_expired(self):
         """Remove expired cache entries."""
@@ -330,6 +399,10 @@ class ProviderAwareCache:
         for key in provider_keys:
             del self._cache[key]
     
+    def size(self) -> int:
+        """Number of cached entries; O(1) and safe for debug/repr paths."""
+        return len(self._cache)
+    
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
         total_entries = len(self._cache)
@@ -341,37 +414,125 @@ class ProviderAwareCache:
                 'by_status': {},
             }
         
-        by_provider = {}
-        by_data_type = {}
-        by_status = {}
-        
-        for entry in self._cache.values():
-            # Count by provider
-            by_provider[entry.provider] = by_provider.get(entry.provider, 0) + 1
-            
-            # Count by data type
-            by_data_type[entry.data_type] = by_data_type.get(entry.data_type, 0) + 1
-            
-            # Count by status
-            status = entry.status.value
-            by_status[status] = by_status.get(status, 0) + 1
-        
+        # Push the aggregation into C-implemented Counter instead of
+        # per-entry dict.get increments
+        now = time.monotonic()
+        entries = self._cache.values()
+        by_provider = Counter(entry.provider for entry in entries)
+        by_data_type = Counter(entry.data_type for entry in entries)
+        by_status = Counter(entry.status_at(now).value for entry in entries)
+
         return {
             'total_entries': total_entries,
-            'by_provider': by_provider,
-            'by_data_type': by_data_type,
-            'by_status': by_status,
+            'by_provider': dict(by_provider),
+            'by_data_type': dict(by_data_type),
+            'by_status': dict(by_status),
         }
     
     def clear_all(self):
         """Clear all cached data."""
         self._cache.clear()
+        self._expiry_heap.clear()
+
+    # On-disk persistence - avoids re-fetching everything from the network
+    # on every process restart
+
+    _PERSIST_VERSION = 1
+
+    def save(self, path: str):
+        """Persist the cache to disk so the next process starts warm."""
+        now = time.monotonic()
+        entries = [
+            (
+                entry.cache_key,
+                entry.data,
+                entry.provider,
+                entry.timestamp,
+                entry.data_type,
+                entry.ttl_seconds,
+            )
+            for entry in self._cache.values()
+            if entry.status_at(now) != CacheEntryStatus.EXPIRED
+        ]
+        payload = {
+            'version': self._PERSIST_VERSION,
+            'saved_at': datetime.now(),
+            'entries': entries,
+        }
+        tmp_path = f"{path}.tmp.{os.getpid()}"
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)  # Atomic swap so readers never see a partial file
+            logger.debug(f"Persisted {len(entries)} cache entries to {path}")
+        except Exception as e:
+            logger.warning(f"Failed to persist cache to {path}: {e}")
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+    def load(self, path: str):
+        """Load persisted cache entries, skipping anything that has expired."""
+        try:
+            with open(path, 'rb') as f:
+                payload = pickle.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"Failed to load persisted cache from {path}: {e}")
+            return
+
+        if payload.get('version') != self._PERSIST_VERSION:
+            logger.info(f"Ignoring persisted cache with schema version {payload.get('version')}")
+            return
+
+        now = datetime.now()
+        loaded = 0
+        for cache_key, data, provider, timestamp, data_type, ttl_seconds in payload.get('entries', []):
+            # Recompute remaining lifetime from the absolute timestamp; the
+            # monotonic thresholds stored at save time are meaningless here
+            age_seconds = (now - timestamp).total_seconds()
+            if age_seconds >= ttl_seconds:
+                continue
+            entry = CacheEntry(
+                data=data,
+                provider=provider,
+                timestamp=timestamp,
+                cache_key=cache_key,
+                data_type=data_type,
+                ttl_seconds=ttl_seconds,
+            )
+            entry._stale_at -= age_seconds
+            entry._expires_at -= age_seconds
+            self._cache[cache_key] = entry
+            heapq.heappush(self._expiry_heap, (entry._expires_at, cache_key))
+            loaded += 1
+
+        logger.debug(f"Loaded {loaded} cache entries from {path}")
 
 
 # Global cache instance
 _enhanced_cache = ProviderAwareCache()
 
+# Optional on-disk persistence: set HEDGE_FUND_CACHE_FILE to a path to make
+# restarts start from the previous session's still-valid entries
+_persistence_initialized = False
+
+
+def _init_cache_persistence():
+    global _persistence_initialized
+    if _persistence_initialized:
+        return
+    _persistence_initialized = True
+
+    cache_file = os.environ.get("HEDGE_FUND_CACHE_FILE")
+    if cache_file:
+        _enhanced_cache.load(cache_file)
+        atexit.register(_enhanced_cache.save, cache_file)
+
 
 def get_enhanced_cache() -> ProviderAwareCache:
     """Get the global enhanced cache instance."""
+    _init_cache_persistence()
     return _enhanced_cache
\ No newline at end of file
@@ -3,10 +3,15 @@ Legacy adapter for smooth migration from financialdatasets.ai to multi-provider
 This module provides utilities to help during the transition period.
 """
 
+import itertools
 import logging
+import os
+import threading
+import time
 import warnings
+from collections import deque
 from typing import Any, Dict, List, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from src.tools.api import (
     get_provider_manager,
@@ -22,18 +27,39 @@ from src.tools.api import (
 logger = logging.getLogger(__name__)
 
 
+# Static recommendation text, built once instead of re-concatenated per call
+_RECOMMENDATION_KEY_PRESENT = (
+    "FINANCIAL_DATASETS_API_KEY is still set. "
+    "This will be used as a fallback provider, which is recommended for maximum data coverage."
+)
+_RECOMMENDATION_KEY_ABSENT = (
+    "No FINANCIAL_DATASETS_API_KEY found. "
+    "The system will use free providers (Yahoo Finance, STOOQ). "
+    "Consider setting the API key for access to premium features like news and insider trades."
+)
+
+
 class DeprecationWarning(UserWarning):
     """Custom warning for deprecated functionality."""
     pass
 
 
+# Functions that have already warned this process; steady-state calls
+# skip the warnings machinery (filter list + stack walk) entirely
+_warned_functions: set = set()
+
+
 def warn_deprecated(old_function: str, new_function: str = None):
-    """Issue a deprecation warning for old API usage."""
+    """Issue a deprecation warning for old API usage, once per function."""
+    if old_function in _warned_functions:
+        return
+    _warned_functions.add(old_function)
+
     if new_function:
         message = f"{old_function} is deprecated. Use {new_function} instead."
     else:
         message = f"{old_function} is deprecated and will be removed in a future version."
-    
+
     warnings.warn(message, DeprecationWarning, stacklevel=3)
 
 
@@ -73,9 +99,16 @@ class MigrationHelper:
     Helper class to assist with migration from the old API to the new multi-provider system.
     """
     
-    def __init__(self):
-        self.migration_log = []
+    def __init__(self, max_log_entries: int = 1000):
+        # Bounded so long-running processes don't accumulate events forever;
+        # the report only ever shows the most recent handful anyway
+        self.migration_log = deque(maxlen=max_log_entries)
+        self._log_lock = threading.Lock()  # Events can race when tests run concurrently
         self._provider_manager = None
+        self._api_key_cache: Optional[tuple] = None  # (env value, status dict)
+        self._health_cache: Optional[Dict[str, Any]] = None
+        self._health_cache_ts = 0.0
+        self._snapshot_cache: Optional[tuple] = None  # (monotonic ts, api_status, continuity)
     
     @property
     def provider_manager(self):
@@ -84,23 +117,43 @@ class MigrationHelper:
             self._provider_manager = get_provider_manager()
         return self._provider_manager
     
+    def _cached_health(self, ttl: float = 30.0) -> Dict[str, Any]:
+        """
+        Get provider health status, reusing a recent poll when available.
+
+        Health checks hit every provider, so report regeneration within the
+        TTL window reuses the last result instead of re-polling.
+        """
+        now = time.monotonic()
+        if self._health_cache is None or now - self._health_cache_ts >= ttl:
+            self._health_cache = self.provider_manager.get_provider_health_status()
+            self._health_cache_ts = now
+        return self._health_cache
+
     def log_migration_event(self, event: str, details: Dict[str, Any] = None):
         """Log a migration event for tracking purposes."""
+        # Store a raw epoch float; ISO formatting is deferred to readers,
+        # and only the handful of rendered events ever pay for it
         entry = {
-            'timestamp': datetime.now().isoformat(),
+            'ts': time.time(),
             'event': event,
             'details': details or {}
         }
-        self.migration_log.append(entry)
-        logger.info(f"Migration event: {event}")
+        with self._log_lock:
+            self.migration_log.append(entry)
+        logger.info("Migration event: %s", event)
     
     def check_api_key_usage(self) -> Dict[str, Any]:
         """
         Check if the old FINANCIAL_DATASETS_API_KEY is still being used.
         """
-        import os
-        
         api_key = os.environ.get("FINANCIAL_DATASETS_API_KEY")
+
+        # The status only depends on the env value - reuse the cached result
+        # (and skip re-logging) until the key actually changes
+        if self._api_key_cache is not None and self._api_key_cache[0] == api_key:
+            return dict(self._api_key_cache[1])
+
         status = {
             'api_key_present': api_key is not None,
             'api_key_length': len(api_key) if api_key else 0,
@@ -108,29 +161,24 @@ class MigrationHelper:
         }
         
         if api_key:
-            status['recommendation'] = (
-                "FINANCIAL_DATASETS_API_KEY is still set. "
-                "This will be used as a fallback provider, which is recommended for maximum data coverage."
-            )
+            status['recommendation'] = _RECOMMENDATION_KEY_PRESENT
             self.log_migration_event('api_key_check', {'status': 'present', 'fallback_available': True})
         else:
-            status['recommendation'] = (
-                "No FINANCIAL_DATASETS_API_KEY found. "
-                "The system will use free providers (Yahoo Finance, STOOQ). "
-                "Consider setting the API key for access to premium features like news and insider trades."
-            )
+            status['recommendation'] = _RECOMMENDATION_KEY_ABSENT
             self.log_migration_event('api_key_check', {'status': 'absent', 'fallback_available': False})
-        
+
+        self._api_key_cache = (api_key, status)
         return status
     
     def test_data_continuity(self, test_ticker: str = "AAPL") -> Dict[str, Any]:
         """
         Test that data retrieval works with the new system and compare with expectations.
         """
-        from datetime import datetime, timedelta
-        
-        end_date = datetime.now().strftime("%Y-%m-%d")
-        start_date = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
+        # One clock read shared by both bounds, so start/end always come
+        # from the same instant
+        now = datetime.now()
+        end_date = now.strftime("%Y-%m-%d")
+        start_date = (now - timedelta(days=7)).strftime("%Y-%m-%d")
         
         results = {
             'ticker': test_ticker,
@@ -139,54 +187,39 @@ class MigrationHelper:
             'summary': {}
         }
         
-        # Test price data
-        try:
-            prices = get_prices(test_ticker, start_date, end_date)
-            results['tests']['prices'] = {
-                'success': True,
-                'count': len(prices),
-                'provider': 'unknown'  # We don't expose this in the legacy API
-            }
-            self.log_migration_event('data_test_prices', {'ticker': test_ticker, 'success': True, 'count': len(prices)})
-        except Exception as e:
-            results['tests']['prices'] = {
-                'success': False,
-                'error': str(e)
-            }
-            self.log_migration_event('data_test_prices', {'ticker': test_ticker, 'success': False, 'error': str(e)})
-        
-        # Test financial metrics
-        try:
-            metrics = get_financial_metrics(test_ticker, end_date, limit=1)
-            results['tests']['financial_metrics'] = {
-                'success': True,
-                'count': len(metrics)
-            }
-            self.log_migration_event('data_test_metrics', {'ticker': test_ticker, 'success': True, 'count': len(metrics)})
-        except Exception as e:
-            results['tests']['financial_metrics'] = {
-                'success': False,
-                'error': str(e)
-            }
-            self.log_migration_event('data_test_metrics', {'ticker': test_ticker, 'success': False, 'error': str(e)})
-        
-        # Test market cap
-        try:
-            market_cap = get_market_cap(test_ticker, end_date)
-            results['tests']['market_cap'] = {
-                'success': market_cap is not None,
-                'value': market_cap
-            }
-            self.log_migration_event('data_test_market_cap', {'ticker': test_ticker, 'success': market_cap is not None})
-        except Exception as e:
-            results['tests']['market_cap'] = {
-                'success': False,
-                'error': str(e)
-            }
-            self.log_migration_event('data_test_market_cap', {'ticker': test_ticker, 'success': False, 'error': str(e)})
+        # One bundle call fetches all three probes; the provider manager
+        # fans them out over its keep-alive sessions, so this costs roughly
+        # one round trip instead of three sequential ones
+        bundle = self.provider_manager.get_bundle(test_ticker, start_date, end_date)
+
+        def _fail(error: str) -> Dict[str, Any]:
+            return {'success': False, 'error': error}
+
+        # Table-driven unpacking: one loop handles every part instead of
+        # three near-identical if/elif branches
+        part_table = (
+            ('prices', 'prices', 'data_test_prices',
+             lambda data, provider: {'success': True, 'count': len(data), 'provider': provider}),
+            ('metrics', 'financial_metrics', 'data_test_metrics',
+             lambda data, provider: {'success': True, 'count': len(data)}),
+            ('market_cap', 'market_cap', 'data_test_market_cap',
+             lambda data, provider: {'success': data is not None, 'value': data}),
+        )
+        for part, test_name, event_name, build_result in part_table:
+            outcome = bundle.get(part)
+            if isinstance(outcome, Exception):
+                error = str(outcome)
+                results['tests'][test_name] = _fail(error)
+                self.log_migration_event(event_name, {'ticker': test_ticker, 'success': False, 'error': error})
+                continue
+
+            data, provider_used = outcome
+            test_result = build_result(data, provider_used)
+            results['tests'][test_name] = test_result
+            self.log_migration_event(event_name, {'ticker': test_ticker, 'success': test_result['success']})
         
         # Summary
-        successful_tests = sum(1 for test in results['tests'].values() if test.get('success', False))
+        successful_tests = sum(test.get('success', False) for test in results['tests'].values())
         total_tests = len(results['tests'])
         
         results['summary'] = {
@@ -198,82 +231,108 @@ class MigrationHelper:
         
         return results
     
+    def snapshot(self, ttl: float = 60.0) -> Dict[str, Any]:
+        """
+        Run the API key check and data continuity test at most once per TTL.
+
+        check_migration_status and generate_migration_report both need the
+        same two results; sharing a snapshot means one set of provider calls
+        serves both a status summary and a full report.
+        """
+        now = time.monotonic()
+        if self._snapshot_cache is not None and now - self._snapshot_cache[0] < ttl:
+            _, api_status, continuity = self._snapshot_cache
+        else:
+            api_status = self.check_api_key_usage()
+            continuity = self.test_data_continuity()
+            self._snapshot_cache = (now, api_status, continuity)
+        return {'api_key_status': api_status, 'continuity_test': continuity}
+
     def generate_migration_report(self) -> str:
         """
         Generate a comprehensive migration report.
         """
-        report_lines = [
+        header = (
             "AI Hedge Fund Data Provider Migration Report",
             "=" * 50,
             f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
             "",
-        ]
-        
+        )
+
+        snapshot = self.snapshot()
+
         # API Key Status
-        api_key_status = self.check_api_key_usage()
-        report_lines.extend([
+        api_key_status = snapshot['api_key_status']
+        api_section = (
             "API Key Status:",
             f"  - Key Present: {'Yes' if api_key_status['api_key_present'] else 'No'}",
             f"  - Recommendation: {api_key_status['recommendation']}",
             "",
-        ])
-        
+        )
+
         # Provider Health
         try:
-            health_status = self.provider_manager.get_provider_health_status()
-            healthy_count = sum(1 for status in health_status.values() if status['healthy'])
+            health_status = self._cached_health()
+            healthy_count = sum(status['healthy'] for status in health_status.values())
             total_count = len(health_status)
-            
-            report_lines.extend([
+
+            provider_lines = [
+                f"  - {provider}: {'✓' if status['healthy'] else '✗'} "
+                f"(Success: {format(status['success_rate'], '.1%') if status['total_requests'] > 0 else 'N/A'})"
+                for provider, status in health_status.items()
+            ]
+            health_section = [
                 "Provider Health:",
                 f"  - Healthy Providers: {healthy_count}/{total_count}",
                 "",
                 "Provider Details:",
-            ])
-            
-            for provider, status in health_status.items():
-                health_icon = "✓" if status['healthy'] else "✗"
-                success_rate = f"{status['success_rate']:.1%}" if status['total_requests'] > 0 else "N/A"
-                report_lines.append(f"  - {provider}: {health_icon} (Success: {success_rate})")
-            
-            report_lines.append("")
+                *provider_lines,
+                "",
+            ]
         except Exception as e:
-            report_lines.extend([
+            health_section = [
                 "Provider Health: ERROR",
                 f"  - Could not retrieve health status: {e}",
                 "",
-            ])
-        
+            ]
+
         # Data Continuity Test
-        continuity_test = self.test_data_continuity()
-        report_lines.extend([
+        continuity_test = snapshot['continuity_test']
+        test_detail_lines = [
+            f"  - {test_name}: {'✓' if test_result['success'] else '✗'} "
+            + (f"(Count: {test_result.get('count', 'N/A')})" if test_result['success']
+               else f"(Error: {test_result.get('error', 'Unknown')})")
+            for test_name, test_result in continuity_test['tests'].items()
+        ]
+        continuity_section = (
             "Data Continuity Test:",
             f"  - Test Ticker: {continuity_test['ticker']}",
             f"  - Success Rate: {continuity_test['summary']['success_rate']:.1%}",
             f"  - Migration Viable: {'Yes' if continuity_test['summary']['migration_viable'] else 'No'}",
             "",
             "Test Details:",
-        ])
-        
-        for test_name, test_result in continuity_test['tests'].items():
-            status_icon = "✓" if test_result['success'] else "✗"
-            detail = f"Count: {test_result.get('count', 'N/A')}" if test_result['success'] else f"Error: {test_result.get('error', 'Unknown')}"
-            report_lines.append(f"  - {test_name}: {status_icon} ({detail})")
-        
-        report_lines.append("")
-        
-        # Migration Events Log
+            *test_detail_lines,
+            "",
+        )
+
+        # Migration Events Log (last 10 events; deque has no slicing)
         if self.migration_log:
-            report_lines.extend([
+            recent_events = list(itertools.islice(
+                reversed(self.migration_log), 10
+            ))[::-1]
+            events_section = (
                 "Migration Events:",
-                ""
-            ])
-            for event in self.migration_log[-10:]:  # Show last 10 events
-                report_lines.append(f"  - {event['timestamp']}: {event['event']}")
-            report_lines.append("")
-        
-        # Recommendations
-        report_lines.extend([
+                "",
+                *(
+                    f"  - {datetime.fromtimestamp(event['ts']).strftime('%Y-%m-%d %H:%M:%S')}: {event['event']}"
+                    for event in recent_events
+                ),
+                "",
+            )
+        else:
+            events_section = ()
+
+        recommendations = (
             "Recommendations:",
             "  1. The migration to multi-provider system is complete",
             "  2. All existing code should work without changes",
@@ -281,21 +340,43 @@ class MigrationHelper:
             "  4. Consider setting FINANCIAL_DATASETS_API_KEY for premium features",
             "  5. Use cache warming for frequently accessed tickers",
             "",
-        ])
-        
-        return "\n".join(report_lines)
+        )
+
+        # One pass over all sections, one allocation for the final string
+        return "\n".join(itertools.chain(
+            header, api_section, health_section,
+            continuity_section, events_section, recommendations,
+        ))
     
-    def get_migration_log(self) -> List[Dict[str, Any]]:
-        """Get the migration log entries."""
-        return self.migration_log.copy()
+    def iter_migration_log(self):
+        """Iterate over log entries lazily, formatting timestamps on demand."""
+        for entry in self.migration_log:
+            yield {
+                'timestamp': datetime.fromtimestamp(entry['ts']).isoformat(),
+                'event': entry['event'],
+                'details': entry['details'],
+            }
 
+    def get_migration_log(self) -> tuple:
+        """Get the migration log entries as an immutable snapshot."""
+        return tuple(self.iter_migration_log())
 
-# Global migration helper instance
-_migration_helper = MigrationHelper()
+
+# Global migration helper instance, created lazily so importers that never
+# touch migration APIs pay no construction cost
+_migration_helper: Optional[MigrationHelper] = None
+_migration_helper_lock = threading.Lock()
 
 
 def get_migration_helper() -> MigrationHelper:
-    """Get the global migration helper instance."""
+    """Get the global migration helper instance, creating it on first use."""
+    global _migration_helper
+    if _migration_helper is None:
+        # Double-checked locking: the unlocked read keeps the common path free
+        # of lock overhead while first construction stays thread-safe
+        with _migration_helper_lock:
+            if _migration_helper is None:
+                _migration_helper = MigrationHelper()
     return _migration_helper
 
 
@@ -309,10 +390,11 @@ def check_migration_status() -> Dict[str, Any]:
         Dictionary with migration status information
     """
     helper = get_migration_helper()
-    
-    api_status = helper.check_api_key_usage()
-    continuity_test = helper.test_data_continuity()
-    
+
+    snapshot = helper.snapshot()
+    api_status = snapshot['api_key_status']
+    continuity_test = snapshot['continuity_test']
+
     return {
         'migration_complete': True,
         'api_key_present': api_status['api_key_present'],
@@ -333,18 +415,23 @@ def generate_migration_report() -> str:
 
 
 if __name__ == "__main__":
-    # Quick migration check
+    # Quick migration check: take one snapshot and render both the short
+    # summary and the full report from it, so providers are hit once
     print("AI Hedge Fund Migration Check")
     print("=" * 40)
-    
-    status = check_migration_status()
-    print(f"Migration Complete: {'✓' if status['migration_complete'] else '✗'}")
-    print(f"Data Continuity: {'✓' if status['data_continuity_viable'] else '✗'}")
-    print(f"API Key Present: {'✓' if status['api_key_present'] else '✗'}")
+
+    helper = get_migration_helper()
+    snap = helper.snapshot()
+    api_status = snap['api_key_status']
+    continuity_test = snap['continuity_test']
+
+    print("Migration Complete: ✓")
+    print(f"Data Continuity: {'✓' if continuity_test['summary']['migration_viable'] else '✗'}")
+    print(f"API Key Present: {'✓' if api_status['api_key_present'] else '✗'}")
     print()
-    print("Recommendation:", status['recommendation'])
+    print("Recommendation:", api_status['recommendation'])
     print()
-    
-    # Generate full report
+
+    # generate_migration_report consumes the snapshot cached above
     print("Full Migration Report:")
-    print(generate_migration_report())
\ No newline at end of file
+    print(helper.generate_migration_report())
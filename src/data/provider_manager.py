@@ -1,23 +1,23 @@
+import itertools
+import sys
 import time
 import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from collections import OrderedDict, deque
 from typing import List, Optional, Dict, Any, Tuple
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 
 from src.data.providers.base import (
     DataProvider,
     DataProviderError,
+    build_http_session,
     DataProviderRateLimitError,
     DataProviderTimeoutError,
     DataProviderNotFoundError,
 )
-from src.data.providers import (
-    YahooFinanceProvider,
-    StooqProvider,
-    FinancialDatasetsProvider,
-    SECEdgarProvider,
-)
 from src.data.models import (
     Price,
     FinancialMetrics,
@@ -38,15 +38,82 @@ class ProviderPriority(Enum):
     FALLBACK = 3
 
 
-@dataclass
+class CircuitState(Enum):
+    """Circuit breaker states."""
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+
+@dataclass(slots=True)
 class ProviderHealth:
     """Track provider health and circuit breaker state."""
     is_healthy: bool = True
     failure_count: int = 0
-    last_failure_time: Optional[datetime] = None
-    circuit_open_until: Optional[datetime] = None
+    # Monotonic-clock floats: cheaper to compare than datetimes on the hot
+    # path and immune to wallclock adjustments
+    last_failure_time: Optional[float] = None  # time.time() epoch, for display
+    circuit_open_until: Optional[float] = None  # time.monotonic() deadline
     total_requests: int = 0
     successful_requests: int = 0
+    # Sliding window of the most recent outcomes (True = success); circuit
+    # decisions look at this instead of lifetime counters, so old successes
+    # can't mask a fresh burst of failures
+    recent_outcomes: deque = field(default_factory=lambda: deque(maxlen=32))
+    circuit_state: CircuitState = CircuitState.CLOSED
+    # Probe requests remaining while HALF_OPEN; replenished on the
+    # OPEN -> HALF_OPEN transition
+    probe_budget: int = 0
+
+
+class _PriceBatcher:
+    """
+    Collect concurrent price requests into one multi-ticker download.
+
+    Callers for the same date range that arrive within the collection
+    window share a single batched upstream request: the first caller
+    becomes the leader, sleeps out the window, flushes the accumulated
+    tickers in one call, and resolves everyone's Future.
+    """
+
+    def __init__(self, flush, max_wait: float = 0.02, max_size: int = 25):
+        self._flush = flush  # callable(tickers, start_date, end_date) -> {ticker: prices}
+        self._max_wait = max_wait
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._pending: Dict[tuple, Dict[str, Future]] = {}
+
+    def fetch(self, ticker: str, start_date: str, end_date: str):
+        """Request one ticker; blocks until its batch is flushed."""
+        key = (start_date, end_date)
+        with self._lock:
+            group = self._pending.get(key)
+            leader = group is None
+            if leader:
+                group = {}
+                self._pending[key] = group
+            future = group.get(ticker)
+            if future is None:
+                future = Future()
+                group[ticker] = future
+
+        if leader:
+            time.sleep(self._max_wait)  # Collection window for followers
+            with self._lock:
+                group = self._pending.pop(key, {})
+            try:
+                results = {}
+                tickers = list(group)
+                for start in range(0, len(tickers), self._max_size):
+                    chunk = tickers[start:start + self._max_size]
+                    results.update(self._flush(chunk, start_date, end_date))
+                for name, fut in group.items():
+                    fut.set_result(results.get(name, []))
+            except Exception as e:
+                for fut in group.values():
+                    fut.set_exception(e)
+
+        return future.result()
 
 
 class DataProviderManager:
@@ -67,25 +134,50 @@ class DataProviderManager:
         Args:
             financial_datasets_api_key: Optional API key for FinancialDatasets provider
         """
-        # Initialize providers
+        # Provider classes are imported here, not at module top, so the
+        # package's lazy loading means only instantiated providers pay
+        # their import cost
+        from src.data.providers import (
+            YahooFinanceProvider,
+            StooqProvider,
+            SECEdgarProvider,
+        )
+        
+        # Initialize providers, each with its own pooled keep-alive session
+        # so repeat calls to the same host skip TCP+TLS handshakes
         self.providers = {
-            'yahoo': YahooFinanceProvider(),
-            'stooq': StooqProvider(),
-            'financialdatasets': FinancialDatasetsProvider(financial_datasets_api_key),
-            'sec_edgar': SECEdgarProvider(),
+            'yahoo': YahooFinanceProvider(session=build_http_session()),
+            'stooq': StooqProvider(session=build_http_session()),
+            'sec_edgar': SECEdgarProvider(session=build_http_session()),
         }
         
+        # The financialdatasets client is useless without a key, so only
+        # build (and import) it when one is configured
+        import os
+        if financial_datasets_api_key or os.environ.get("FINANCIAL_DATASETS_API_KEY"):
+            from src.data.providers import FinancialDatasetsProvider
+            self.providers['financialdatasets'] = FinancialDatasetsProvider(
+                financial_datasets_api_key, session=build_http_session()
+            )
+        
         # Provider health tracking
         self.provider_health = {
             name: ProviderHealth() for name in self.providers.keys()
         }
+        # One bit per provider; a set bit means the breaker is not CLOSED.
+        # The availability filter tests this mask before paying for the
+        # full admission check
+        self._provider_bit = {
+            name: 1 << index for index, name in enumerate(self.providers)
+        }
+        self._open_mask = 0
         
         # Initialize enhanced cache
         self.cache = get_enhanced_cache()
         
         # Circuit breaker configuration
         self.failure_threshold = 3  # Failures before opening circuit
-        self.circuit_timeout = timedelta(minutes=5)  # How long to keep circuit open
+        self.circuit_timeout = 300.0  # Seconds to keep circuit open
         self.success_threshold = 2  # Successes needed to close circuit
         
         # Provider priorities by data type
@@ -120,40 +212,140 @@ class DataProviderManager:
             ],
         }
         
+        # Shared worker pool for hedged provider requests and bundle fan-out
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='provider')
+        # Hot-object layer: a tiny TTL'd LRU of already-materialized
+        # results, so repeat fetches within the window skip cache-key
+        # handling and model re-materialization entirely
+        self._hot: OrderedDict = OrderedDict()  # key -> (monotonic ts, result tuple)
+        self._hot_lock = threading.Lock()
+        self._hot_max_entries = 4096
+        self._hot_ttl_seconds = 60.0
+        # Single-flight map: concurrent identical fetches share one upstream
+        # request instead of each hitting the network on a cold cache
+        self._inflight: Dict[tuple, Future] = {}
+        self._inflight_lock = threading.Lock()
+        # Stale-while-revalidate: stale cache hits return immediately while
+        # a background refresh brings the entry up to date
+        self._refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='refresh')
+        self._refresh_inflight: set = set()
+        self._refresh_lock = threading.Lock()
+        # Wallclock budget per provider attempt; a hung call stops blocking
+        # fallback once its budget elapses
+        self._provider_timeouts = {
+            'yahoo': 5.0,
+            'stooq': 4.0,
+            'financialdatasets': 8.0,
+            'sec_edgar': 10.0,
+        }
+        self._default_attempt_timeout = 10.0
+        # Per-provider concurrency caps so parallel warming/hedging can't
+        # stampede a single upstream into rate limiting
+        self._provider_limits = {
+            'yahoo': threading.Semaphore(4),
+            'stooq': threading.Semaphore(4),
+            'financialdatasets': threading.Semaphore(4),
+            'sec_edgar': threading.Semaphore(2),
+        }
+        # How many providers to race concurrently per fetch; the first
+        # success wins and the losers' results are discarded
+        self.hedge_width = 2
+        
+        # Adaptive batching for price fetches: concurrent callers within a
+        # 20ms window share one multi-ticker Yahoo download
+        if 'yahoo' in self.providers:
+            self._price_batcher = _PriceBatcher(self._flush_price_batch)
+        else:
+            self._price_batcher = None
+        
+        # Pre-bound dispatch tables: for each data type, resolve the cache
+        # getter/setter and per-provider bound methods once, so the fetch
+        # hot path is tuple unpacking instead of dict+getattr per call
+        self._build_dispatch_tables()
+        
         logger.info(f"Initialized DataProviderManager with {len(self.providers)} providers")
     
     def _is_circuit_open(self, provider_name: str) -> bool:
-        """Check if circuit breaker is open for a provider."""
+        """Check if circuit breaker is currently open (read-only)."""
         health = self.provider_health[provider_name]
-        if health.circuit_open_until and datetime.now() < health.circuit_open_until:
+        if health.circuit_state is CircuitState.OPEN:
+            return health.circuit_open_until is None or time.monotonic() < health.circuit_open_until
+        return False
+    
+    def _admit_request(self, provider_name: str) -> bool:
+        """
+        Decide whether a request may go to this provider right now.
+        
+        Handles the OPEN -> HALF_OPEN transition once the open window has
+        elapsed; while HALF_OPEN only a limited number of probe requests
+        are admitted, and their outcomes decide CLOSED vs re-OPEN.
+        """
+        health = self.provider_health[provider_name]
+        state = health.circuit_state
+        if state is CircuitState.CLOSED:
+            return True
+        if state is CircuitState.OPEN:
+            if health.circuit_open_until and time.monotonic() >= health.circuit_open_until:
+                health.circuit_state = CircuitState.HALF_OPEN
+                health.probe_budget = self.success_threshold
+                logger.info(f"Circuit breaker half-open for provider '{provider_name}'")
+            else:
+                return False
+        # HALF_OPEN: admit while probe budget remains
+        if health.probe_budget > 0:
+            health.probe_budget -= 1
             return True
         return False
     
     def _open_circuit(self, provider_name: str):
         """Open circuit breaker for a provider."""
         health = self.provider_health[provider_name]
-        health.circuit_open_until = datetime.now() + self.circuit_timeout
+        health.circuit_state = CircuitState.OPEN
+        health.circuit_open_until = time.monotonic() + self.circuit_timeout
+        health.probe_budget = 0
         health.is_healthy = False
-        logger.warning(f"Circuit breaker opened for provider '{provider_name}' until {health.circuit_open_until}")
+        self._open_mask |= self._provider_bit[provider_name]
+        logger.warning(f"Circuit breaker opened for provider '{provider_name}' for {self.circuit_timeout:.0f}s")
     
     def _close_circuit(self, provider_name: str):
         """Close circuit breaker for a provider."""
         health = self.provider_health[provider_name]
+        health.circuit_state = CircuitState.CLOSED
         health.circuit_open_until = None
+        health.probe_budget = 0
         health.failure_count = 0
+        health.recent_outcomes.clear()  # Fresh window after recovery
         health.is_healthy = True
+        self._open_mask &= ~self._provider_bit[provider_name]
         logger.info(f"Circuit breaker closed for provider '{provider_name}'")
     
+    def _refund_probe(self, provider_name: str):
+        """
+        Return an unused probe slot after a neutral outcome.
+
+        Not-found says nothing about provider health (the data may simply
+        not exist for that ticker), so a half-open probe that ends this
+        way must not consume the budget — otherwise routine not-found
+        responses exhaust it and strand the provider in HALF_OPEN with no
+        way to ever be admitted again.
+        """
+        health = self.provider_health[provider_name]
+        if health.circuit_state is CircuitState.HALF_OPEN:
+            health.probe_budget += 1
+
     def _record_success(self, provider_name: str):
         """Record a successful request for a provider."""
         health = self.provider_health[provider_name]
         health.total_requests += 1
         health.successful_requests += 1
+        health.recent_outcomes.append(True)
         
-        # If circuit was open, check if we can close it
-        if health.circuit_open_until:
-            consecutive_successes = health.successful_requests - (health.total_requests - health.successful_requests)
-            if consecutive_successes >= self.success_threshold:
+        # While half-open, close once the probe streak is all successes
+        if health.circuit_state is CircuitState.HALF_OPEN:
+            recent = health.recent_outcomes
+            if len(recent) >= self.success_threshold and all(
+                itertools.islice(reversed(recent), self.success_threshold)
+            ):
                 self._close_circuit(provider_name)
     
     def _record_failure(self, provider_name: str, error: Exception):
@@ -161,44 +353,34 @@ class DataProviderManager:
         health = self.provider_health[provider_name]
         health.total_requests += 1
         health.failure_count += 1
-        health.last_failure_time = datetime.now()
+        health.last_failure_time = time.time()
+        health.recent_outcomes.append(False)
         
-        # Open circuit breaker if failure threshold reached
-        if health.failure_count >= self.failure_threshold and not health.circuit_open_until:
+        # A failed probe re-opens immediately; otherwise open when the
+        # sliding window holds enough failures
+        if health.circuit_state is CircuitState.HALF_OPEN:
             self._open_circuit(provider_name)
+        elif health.circuit_state is CircuitState.CLOSED:
+            recent_failures = sum(not ok for ok in health.recent_outcomes)
+            if recent_failures >= self.failure_threshold:
+                self._open_circuit(provider_name)
         
         # Mark provider as unhealthy
         self.providers[provider_name].mark_unhealthy(error)
         
         logger.warning(f"Provider '{provider_name}' failed: {error}")
     
-    def _get_available_providers(self, data_type: str) -> List[Tuple[str, DataProvider]]:
-        """Get available providers for a data type, ordered by priority."""
-        if data_type not in self.provider_priorities:
-            logger.error(f"Unknown data type: {data_type}")
-            return []
-        
-        available_providers = []
-        for provider_name, priority in self.provider_priorities[data_type]:
-            provider = self.providers[provider_name]
-            
-            # Skip if circuit breaker is open
-            if self._is_circuit_open(provider_name):
-                logger.debug(f"Skipping '{provider_name}' - circuit breaker open")
-                continue
-            
-            # Skip if provider doesn't support the feature
-            if not provider.supports_feature(data_type):
-                logger.debug(f"Skipping '{provider_name}' - doesn't support {data_type}")
-                continue
-                
-            available_providers.append((provider_name, provider))
-        
-        return available_providers
-    
-    def _execute_with_fallback(self, data_type: str, func_name: str, *args, **kwargs):
-        """Execute a function with automatic provider fallback and caching."""
-        # Create cache key arguments
+    def _build_dispatch_tables(self):
+        """Precompute (cache getter, cache setter, provider methods) per data type."""
+        data_type_funcs = {
+            'prices': 'get_prices',
+            'financial_metrics': 'get_financial_metrics',
+            'company_news': 'get_company_news',
+            'insider_trades': 'get_insider_trades',
+            'line_items': 'search_line_items',
+            'company_facts': 'get_company_facts',
+            'market_cap': 'get_market_cap',
+        }
         cache_method_map = {
             'get_prices': ('get_prices', 'set_prices'),
             'get_financial_metrics': ('get_financial_metrics', 'set_financial_metrics'),
@@ -209,97 +391,389 @@ class DataProviderManager:
             'get_market_cap': ('get_market_cap', 'set_market_cap'),
         }
         
-        cache_get_method, cache_set_method = cache_method_map.get(func_name, (None, None))
+        self._dispatch = {}
+        for data_type, priorities in self.provider_priorities.items():
+            func_name = data_type_funcs[data_type]
+            cache_get_method, cache_set_method = cache_method_map.get(func_name, (None, None))
+            cache_getter = getattr(self.cache, cache_get_method) if cache_get_method else None
+            cache_setter = getattr(self.cache, cache_set_method) if cache_set_method else None
+            
+            provider_methods = []
+            for provider_name, priority in priorities:
+                provider = self.providers.get(provider_name)
+                if provider is None:
+                    continue  # Not configured (e.g. financialdatasets without a key)
+                if not provider.supports_feature(data_type):
+                    logger.debug(f"Skipping '{provider_name}' - doesn't support {data_type}")
+                    continue
+                provider_methods.append(
+                    (provider_name, self._provider_bit[provider_name], getattr(provider, func_name))
+                )
+            
+            self._dispatch[data_type] = (cache_getter, cache_setter, provider_methods)
+        
+        # Feature support is constant per provider, so materialize the
+        # monitoring view once as well
+        all_features = list(data_type_funcs)
+        self._supported_features = {
+            name: [feature for feature in all_features if provider.supports_feature(feature)]
+            for name, provider in self.providers.items()
+        }
+    
+    @staticmethod
+    def _canonicalize_arg(arg):
+        """Fold one argument into canonical hashable form."""
+        if isinstance(arg, list):
+            # Order-insensitive: ['revenue', 'ebitda'] and
+            # ['ebitda', 'revenue'] are the same request
+            try:
+                return tuple(sorted(arg))
+            except TypeError:
+                return tuple(arg)
+        return arg
+    
+    @classmethod
+    def _hot_key(cls, data_type: str, args: tuple, kwargs: dict) -> tuple:
+        """
+        Build a canonical, hashable cache key.
+        
+        Logically identical calls that differ only in list ordering
+        collapse to one key, so they share cache entries and in-flight
+        requests instead of each going upstream.
+        """
+        canonicalize = cls._canonicalize_arg
+        return (
+            sys.intern(data_type),
+            tuple(canonicalize(a) for a in args),
+            tuple(sorted((k, canonicalize(v)) for k, v in kwargs.items())),
+        )
+    
+    def _hot_get(self, key: tuple):
+        """Return a live hot-cache entry, or None."""
+        now = time.monotonic()
+        with self._hot_lock:
+            entry = self._hot.get(key)
+            if entry is None:
+                return None
+            if now - entry[0] >= self._hot_ttl_seconds:
+                del self._hot[key]
+                return None
+            self._hot.move_to_end(key)
+            return entry[1]
+    
+    def _hot_put(self, key: tuple, result):
+        """Store a materialized result, evicting the LRU entry when full."""
+        with self._hot_lock:
+            self._hot[key] = (time.monotonic(), result)
+            self._hot.move_to_end(key)
+            while len(self._hot) > self._hot_max_entries:
+                self._hot.popitem(last=False)
+    
+    def _call_with_limit(self, provider_name: str, func, *args, **kwargs):
+        """Invoke a provider method under its concurrency semaphore."""
+        limit = self._provider_limits.get(provider_name)
+        if limit is None:
+            return func(*args, **kwargs)
+        with limit:
+            return func(*args, **kwargs)
+    
+    def _execute_with_fallback(self, data_type: str, func_name: str, *args, **kwargs):
+        """Execute a function with automatic provider fallback and caching."""
+        dispatch = self._dispatch.get(data_type)
+        if dispatch is None:
+            logger.error(f"Unknown data type: {data_type}")
+            raise DataProviderError(f"No available providers for {data_type}")
+        cache_getter, cache_setter, provider_methods = dispatch
+        
+        hot_key = self._hot_key(data_type, args, kwargs)
+        hot_result = self._hot_get(hot_key)
+        if hot_result is not None:
+            return hot_result
+        
+        # Single-flight: if an identical fetch is already running, wait for
+        # its result instead of duplicating the upstream request
+        with self._inflight_lock:
+            existing = self._inflight.get(hot_key)
+            if existing is None:
+                flight = Future()
+                self._inflight[hot_key] = flight
+            else:
+                flight = None
+        if flight is None:
+            return existing.result()
         
+        try:
+            result = self._fetch(
+                data_type, func_name, hot_key,
+                cache_getter, cache_setter, provider_methods,
+                *args, **kwargs
+            )
+            flight.set_result(result)
+            return result
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(hot_key, None)
+    
+    def _fetch(self, data_type, func_name, hot_key,
+               cache_getter, cache_setter, provider_methods,
+               *args, **kwargs):
+        """Run the cache check and hedged provider fan-out for one fetch."""
         # First, check cache if available
         stale_data = None
-        if cache_get_method:
+        if cache_getter:
             try:
-                cache_result = getattr(self.cache, cache_get_method)(*args, **kwargs)
+                cache_result = cache_getter(*args, **kwargs)
                 if cache_result:
                     data, provider_name, cache_status = cache_result
-                    logger.debug(f"Retrieved {data_type} from cache (provider: {provider_name}, status: {cache_status.value})")
+                    logger.debug("Retrieved %s from cache (provider: %s, status: %s)", data_type, provider_name, cache_status.value)
                     
                     # If cache is fresh, return immediately
                     if cache_status == CacheEntryStatus.FRESH:
+                        self._hot_put(hot_key, (data, provider_name))
                         return data, provider_name
                     
-                    # If cache is stale, try to refresh but fall back to cached data if needed
+                    # Stale: serve it immediately and refresh in the background
                     stale_data = data, provider_name
             except Exception as e:
-                logger.debug(f"Cache lookup failed for {data_type}: {e}")
+                logger.debug("Cache lookup failed for %s: %s", data_type, e)
+        
+        if stale_data is not None:
+            self._schedule_refresh(
+                data_type, func_name, hot_key,
+                cache_setter, provider_methods, args, kwargs
+            )
+            return stale_data
+        
+        return self._fetch_upstream(
+            data_type, func_name, hot_key,
+            cache_setter, provider_methods, *args, **kwargs
+        )
+    
+    def _schedule_refresh(self, data_type, func_name, hot_key,
+                          cache_setter, provider_methods, args, kwargs):
+        """Queue a background refresh for a stale entry, once per key."""
+        with self._refresh_lock:
+            if hot_key in self._refresh_inflight:
+                return
+            self._refresh_inflight.add(hot_key)
+        
+        def _refresh():
+            try:
+                result = self._fetch_upstream(
+                    data_type, func_name, hot_key,
+                    cache_setter, provider_methods, *args, **kwargs
+                )
+                self._hot_put(hot_key, result)
+            except Exception as e:
+                logger.debug("Background refresh failed for %s: %s", data_type, e)
+            finally:
+                with self._refresh_lock:
+                    self._refresh_inflight.discard(hot_key)
+        
+        self._refresh_executor.submit(_refresh)
+    
+    def _fetch_upstream(self, data_type, func_name, hot_key,
+                        cache_setter, provider_methods, *args, **kwargs):
+        """Run the hedged provider fan-out for one fetch."""
         
-        available_providers = self._get_available_providers(data_type)
+        # Filter pre-bound provider methods by circuit state only; feature
+        # support was already checked when the dispatch table was built.
+        # A clear mask bit means the breaker is CLOSED and the provider is
+        # admitted without the full state-machine check
+        open_mask = self._open_mask
+        available_providers = [
+            (name, method) for name, bit, method in provider_methods
+            if not (open_mask & bit) or self._admit_request(name)
+        ]
         
         if not available_providers:
-            if stale_data:
-                logger.info(f"No available providers for {data_type}, returning stale cached data")
-                return stale_data
             raise DataProviderError(f"No available providers for {data_type}")
         
         last_error = None
-        for provider_name, provider in available_providers:
-            try:
-                logger.debug(f"Trying provider '{provider_name}' for {data_type}")
-                func = getattr(provider, func_name)
-                result = func(*args, **kwargs)
+        # Hedged requests: race the top providers concurrently and take the
+        # first success, refilling from the priority queue as attempts fail.
+        # This trades duplicate read-only work for much better tail latency
+        # when the primary provider is slow or timing out.
+        remaining = list(available_providers)
+        pending = {}
+        try:
+            while remaining or pending:
+                while remaining and len(pending) < self.hedge_width:
+                    provider_name, provider_method = remaining.pop(0)
+                    logger.debug("Trying provider '%s' for %s", provider_name, data_type)
+                    future = self._executor.submit(
+                        self._call_with_limit, provider_name,
+                        provider_method, *args, **kwargs
+                    )
+                    attempt_timeout = self._provider_timeouts.get(
+                        provider_name, self._default_attempt_timeout
+                    )
+                    pending[future] = (provider_name, time.monotonic() + attempt_timeout)
                 
-                # Cache the result if caching is available
-                if cache_set_method:
+                next_deadline = min(deadline for _, deadline in pending.values())
+                done, _ = wait(
+                    pending,
+                    timeout=max(next_deadline - time.monotonic(), 0),
+                    return_when=FIRST_COMPLETED,
+                )
+                if not done:
+                    # Attempt budget elapsed with nothing finished: treat the
+                    # overdue attempts as timeouts and move on to fallbacks
+                    now = time.monotonic()
+                    overdue = [f for f, (_, deadline) in pending.items() if now >= deadline]
+                    for future in overdue:
+                        provider_name, _ = pending.pop(future)
+                        future.cancel()
+                        timeout_error = DataProviderTimeoutError(
+                            f"Provider '{provider_name}' exceeded its {data_type} attempt budget"
+                        )
+                        last_error = timeout_error
+                        logger.warning(str(timeout_error))
+                        self._record_failure(provider_name, timeout_error)
+                    continue
+                for future in done:
+                    provider_name, _ = pending.pop(future)
                     try:
-                        cache_setter = getattr(self.cache, cache_set_method)
-                        if func_name == 'search_line_items':
-                            # Special handling for line items
-                            cache_setter(*args[:3], args[4], args[3], result, provider_name)
-                        elif func_name in ['get_company_facts', 'get_market_cap']:
-                            # Single argument methods
-                            cache_setter(*args, result, provider_name)
-                        else:
-                            # Multi-argument methods
-                            cache_setter(*args, result, provider_name)
+                        result = future.result()
+                    except DataProviderRateLimitError as e:
+                        last_error = e
+                        logger.warning(f"Provider '{provider_name}' rate limited for {data_type}: {e}")
+                        self._record_failure(provider_name, e)
+                        continue
+                    except DataProviderNotFoundError as e:
+                        last_error = e
+                        logger.debug("Data not found in provider '%s' for %s: %s", provider_name, data_type, e)
+                        # Don't record as failure - data might just not exist
+                        # in this provider. Give back the probe slot so a
+                        # half-open provider isn't stranded by routine
+                        # not-found responses
+                        self._refund_probe(provider_name)
+                        continue
                     except Exception as e:
-                        logger.warning(f"Failed to cache result for {data_type}: {e}")
-                
-                # Record success
-                self._record_success(provider_name)
-                logger.debug(f"Successfully retrieved {data_type} from '{provider_name}'")
-                return result, provider_name
-                
-            except DataProviderRateLimitError as e:
-                last_error = e
-                logger.warning(f"Provider '{provider_name}' rate limited for {data_type}: {e}")
-                self._record_failure(provider_name, e)
-                continue
-                
-            except DataProviderNotFoundError as e:
-                last_error = e
-                logger.debug(f"Data not found in provider '{provider_name}' for {data_type}: {e}")
-                # Don't record as failure - data might just not exist in this provider
-                continue
-                
-            except Exception as e:
-                last_error = e
-                logger.error(f"Provider '{provider_name}' failed for {data_type}: {e}")
-                self._record_failure(provider_name, e)
-                continue
-        
-        # All providers failed - return stale data if available
-        if stale_data:
-            logger.warning(f"All providers failed for {data_type}, returning stale cached data. Last error: {last_error}")
-            return stale_data
+                        last_error = e
+                        logger.error(f"Provider '{provider_name}' failed for {data_type}: {e}")
+                        self._record_failure(provider_name, e)
+                        continue
+                    
+                    # Cache the result if caching is available
+                    if cache_setter:
+                        try:
+                            if func_name == 'search_line_items':
+                                # Special handling for line items
+                                cache_setter(*args[:3], args[4], args[3], result, provider_name)
+                            elif func_name in ['get_company_facts', 'get_market_cap']:
+                                # Single argument methods
+                                cache_setter(*args, result, provider_name)
+                            else:
+                                # Multi-argument methods
+                                cache_setter(*args, result, provider_name)
+                        except Exception as e:
+                            logger.warning(f"Failed to cache result for {data_type}: {e}")
+                    
+                    # Record success
+                    self._record_success(provider_name)
+                    logger.debug("Successfully retrieved %s from '%s'", data_type, provider_name)
+                    self._hot_put(hot_key, (result, provider_name))
+                    return result, provider_name
+        finally:
+            # Cancel hedged attempts that haven't started. Already-running
+            # losers finish in the pool; their results are discarded, but
+            # their outcome must still reach the health accounting or a
+            # persistently failing provider with a healthy hedge partner
+            # would never trip its circuit breaker
+            for future, (provider_name, _) in list(pending.items()):
+                if not future.cancel():
+                    future.add_done_callback(
+                        lambda f, name=provider_name: self._observe_abandoned_attempt(name, data_type, f)
+                    )
         
         # No data available at all
         raise DataProviderError(f"All providers failed for {data_type}. Last error: {last_error}")
+
+    def _observe_abandoned_attempt(self, provider_name: str, data_type: str, future: Future):
+        """Record the outcome of a hedged attempt that lost the race."""
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is None:
+            self._record_success(provider_name)
+        elif isinstance(error, DataProviderNotFoundError):
+            # Don't record as failure - data might just not exist in this provider
+            logger.debug("Abandoned attempt on '%s' found no %s data: %s", provider_name, data_type, error)
+            self._refund_probe(provider_name)
+        else:
+            logger.warning(f"Abandoned attempt on '{provider_name}' failed for {data_type}: {error}")
+            self._record_failure(provider_name, error)
     
     # Public API methods that use the fallback logic
     
+    def _flush_price_batch(self, tickers: List[str], start_date: str, end_date: str) -> Dict[str, List[Price]]:
+        """
+        Flush one batch of tickers through Yahoo's multi-ticker download.
+
+        Health accounting happens here, once per upstream request, rather
+        than per caller: N followers of one successful batch must not
+        record N successes, and a failed flush must count as a failure.
+        """
+        try:
+            results = self._call_with_limit(
+                'yahoo', self.providers['yahoo'].get_prices_batch,
+                tickers, start_date, end_date
+            )
+        except Exception as e:
+            self._record_failure('yahoo', e)
+            raise
+        self._record_success('yahoo')
+        return results
+    
     def get_prices(self, ticker: str, start_date: str, end_date: str) -> Tuple[List[Price], str]:
         """
         Get price data with automatic provider fallback.
         
+        Concurrent cold-cache callers are coalesced into one multi-ticker
+        download via the price batcher; batch failures or empty results
+        fall back to the normal hedged fetch path.
+        
         Returns:
             Tuple of (prices_list, provider_name_used)
         """
+        if self._price_batcher is not None:
+            hot_key = self._hot_key('prices', (ticker, start_date, end_date), {})
+            hot_result = self._hot_get(hot_key)
+            if hot_result is not None:
+                return hot_result
+            
+            try:
+                cache_result = self.cache.get_prices(ticker, start_date, end_date)
+                if cache_result and cache_result[2] == CacheEntryStatus.FRESH:
+                    result = (cache_result[0], cache_result[1])
+                    self._hot_put(hot_key, result)
+                    return result
+            except Exception as e:
+                logger.debug("Cache lookup failed for prices: %s", e)
+            
+            # Respect the circuit breaker before firing a live batched call:
+            # with yahoo OPEN the batcher would otherwise block every cold
+            # caller behind the leader's doomed request instead of failing
+            # fast to the hedged fallback path
+            if self._admit_request('yahoo'):
+                try:
+                    prices = self._price_batcher.fetch(ticker, start_date, end_date)
+                except Exception as e:
+                    logger.debug("Batched price fetch failed for %s: %s", ticker, e)
+                else:
+                    if prices:
+                        try:
+                            self.cache.set_prices(ticker, start_date, end_date, prices, 'yahoo')
+                        except Exception as e:
+                            logger.warning(f"Failed to cache batched prices for {ticker}: {e}")
+                        result = (prices, 'yahoo')
+                        self._hot_put(hot_key, result)
+                        return result
+        
         return self._execute_with_fallback('prices', 'get_prices', ticker, start_date, end_date)
     
     def get_financial_metrics(
@@ -370,6 +844,11 @@ class DataProviderManager:
         Returns:
             Tuple of (line_items_list, provider_name_used)
         """
+        # Memoization happens on the complete argument tuple inside
+        # _execute_with_fallback, whose hot key canonicalizes the item
+        # list. Rows must not be split or merged per item: LineItem uses
+        # extra="allow", so a row fetched for one subset of items does
+        # not carry the fields a different call requested.
         return self._execute_with_fallback(
             'line_items', 'search_line_items',
             ticker, line_items, end_date, period, limit
@@ -393,6 +872,87 @@ class DataProviderManager:
         """
         return self._execute_with_fallback('market_cap', 'get_market_cap', ticker, end_date)
     
+    def get_prices_frame(self, ticker: str, start_date: str, end_date: str):
+        """
+        Get price data as a columnar pandas DataFrame.
+        
+        The built frame is cached alongside the Price objects, so repeat
+        DataFrame consumers (backtester, technical agents) skip both the
+        pydantic objects and frame construction on hits. Callers receive a
+        shallow copy: adding columns is safe, mutating values in place is
+        not.
+        """
+        import numpy as np
+        import pandas as pd
+        from operator import attrgetter
+        
+        frame_key = self._hot_key('prices_frame', (ticker, start_date, end_date), {})
+        frame = self._hot_get(frame_key)
+        if frame is None:
+            prices, _ = self.get_prices(ticker, start_date, end_date)
+            if not prices:
+                return pd.DataFrame()
+            get_row = attrgetter("time", "open", "close", "high", "low", "volume")
+            times, opens, closes, highs, lows, volumes = zip(*map(get_row, prices))
+            frame = pd.DataFrame(
+                {
+                    "open": np.asarray(opens, dtype="float64"),
+                    "close": np.asarray(closes, dtype="float64"),
+                    "high": np.asarray(highs, dtype="float64"),
+                    "low": np.asarray(lows, dtype="float64"),
+                    "volume": np.asarray(volumes, dtype="float64"),
+                    "time": times,
+                },
+                index=pd.DatetimeIndex(pd.to_datetime(list(times)), name="Date"),
+            )
+            frame.sort_index(inplace=True)
+            self._hot_put(frame_key, frame)
+        return frame.copy(deep=False)
+    
+    def get_bundle(
+        self,
+        ticker: str,
+        start_date: str,
+        end_date: str,
+        include: Tuple[str, ...] = ('prices', 'metrics', 'market_cap'),
+    ) -> Dict[str, Any]:
+        """
+        Fetch several independent data types for one ticker in a single call.
+
+        The parts are independent network fetches, so they are dispatched
+        concurrently and the wall time is roughly the slowest single fetch
+        instead of the sum. Each provider keeps its own keep-alive session,
+        so the fan-out reuses existing connections.
+
+        Returns:
+            Dict mapping each requested part to its (data, provider_used)
+            tuple. A part that fails maps to the raised exception instead,
+            so callers can report per-part status (gather-with-exceptions
+            semantics) rather than losing the whole bundle to one failure.
+        """
+        fetchers = {
+            'prices': lambda: self.get_prices(ticker, start_date, end_date),
+            'metrics': lambda: self.get_financial_metrics(ticker, end_date, limit=1),
+            'market_cap': lambda: self.get_market_cap(ticker, end_date),
+        }
+
+        bundle: Dict[str, Any] = {}
+        requested = [part for part in include if part in fetchers]
+        # Bundle parts call back into _execute_with_fallback, which uses the
+        # shared hedge pool; a separate short-lived pool avoids the two
+        # levels of fan-out competing for the same workers
+        with ThreadPoolExecutor(max_workers=len(requested) or 1) as executor:
+            future_to_part = {
+                executor.submit(fetchers[part]): part for part in requested
+            }
+            for future in as_completed(future_to_part):
+                part = future_to_part[future]
+                try:
+                    bundle[part] = future.result()
+                except Exception as e:
+                    bundle[part] = e
+        return bundle
+    
     # Utility methods for monitoring and management
     
     def get_provider_health_status(self) -> Dict[str, Dict[str, Any]]:
@@ -403,12 +963,18 @@ class DataProviderManager:
             status[name] = {
                 'healthy': health.is_healthy,
                 'circuit_open': self._is_circuit_open(name),
-                'circuit_open_until': health.circuit_open_until.isoformat() if health.circuit_open_until else None,
+                'circuit_open_until': (
+                    (datetime.now() + timedelta(seconds=health.circuit_open_until - time.monotonic())).isoformat()
+                    if health.circuit_open_until else None
+                ),
                 'failure_count': health.failure_count,
                 'total_requests': health.total_requests,
                 'successful_requests': health.successful_requests,
                 'success_rate': health.successful_requests / health.total_requests if health.total_requests > 0 else 0,
-                'last_failure': health.last_failure_time.isoformat() if health.last_failure_time else None,
+                'last_failure': (
+                    datetime.fromtimestamp(health.last_failure_time).isoformat()
+                    if health.last_failure_time else None
+                ),
                 'last_error': str(provider.last_error) if provider.last_error else None,
             }
         return status
@@ -417,19 +983,13 @@ class DataProviderManager:
         """Reset health status for a specific provider."""
         if provider_name in self.provider_health:
             self.provider_health[provider_name] = ProviderHealth()
+            self._open_mask &= ~self._provider_bit[provider_name]
             self.providers[provider_name].mark_healthy()
             logger.info(f"Reset health status for provider '{provider_name}'")
     
     def get_supported_features(self) -> Dict[str, List[str]]:
         """Get supported features by each provider."""
-        features = {}
-        for name, provider in self.providers.items():
-            supported = []
-            for feature in ['prices', 'financial_metrics', 'company_news', 'insider_trades', 'line_items', 'company_facts', 'market_cap']:
-                if provider.supports_feature(feature):
-                    supported.append(feature)
-            features[name] = supported
-        return features
+        return {name: list(features) for name, features in self._supported_features.items()}
     
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
@@ -452,28 +1012,46 @@ class DataProviderManager:
             tickers: List of ticker symbols to warm cache for
             days_back: Number of days of price data to cache
         """
-        from datetime import datetime, timedelta
-        
-        end_date = datetime.now().strftime("%Y-%m-%d")
-        start_date = (datetime.now() - timedelta(days=days_back)).strftime("%Y-%m-%d")
+        now = datetime.now()
+        end_date = now.strftime("%Y-%m-%d")
+        start_date = (now - timedelta(days=days_back)).strftime("%Y-%m-%d")
         
         logger.info(f"Warming cache for {len(tickers)} tickers")
         
-        for ticker in tickers:
-            try:
-                # Warm price data
-                self.get_prices(ticker, start_date, end_date)
-                
-                # Warm financial metrics
-                self.get_financial_metrics(ticker, end_date, limit=1)
-                
-                # Warm company facts
-                self.get_company_facts(ticker)
-                
-                logger.debug(f"Warmed cache for {ticker}")
-                
-            except Exception as e:
-                logger.warning(f"Failed to warm cache for {ticker}: {e}")
+        # Prices warm through Yahoo's multi-ticker download: one batched
+        # request per chunk of 50 instead of one request per ticker
+        price_warmed = set()
+        try:
+            yahoo = self.providers['yahoo']
+            for chunk_start in range(0, len(tickers), 50):
+                chunk = tickers[chunk_start:chunk_start + 50]
+                batch = yahoo.get_prices_batch(chunk, start_date, end_date)
+                for ticker, prices in batch.items():
+                    if not prices:
+                        continue
+                    self.cache.set_prices(ticker, start_date, end_date, prices, 'yahoo')
+                    price_warmed.add(ticker)
+            self._record_success('yahoo')
+        except Exception as e:
+            logger.warning(f"Batched price warming failed, falling back per ticker: {e}")
+        
+        # Remaining jobs are independent I/O, so overlap them; per-provider
+        # semaphores keep the fan-out polite to each upstream
+        with ThreadPoolExecutor(max_workers=16, thread_name_prefix='warm') as executor:
+            future_to_job = {}
+            for ticker in tickers:
+                if ticker not in price_warmed:
+                    future_to_job[executor.submit(self.get_prices, ticker, start_date, end_date)] = (ticker, 'prices')
+                future_to_job[executor.submit(self.get_financial_metrics, ticker, end_date, limit=1)] = (ticker, 'financial_metrics')
+                future_to_job[executor.submit(self.get_company_facts, ticker)] = (ticker, 'company_facts')
+            
+            for future in as_completed(future_to_job):
+                ticker, job = future_to_job[future]
+                try:
+                    future.result()
+                    logger.debug(f"Warmed {job} cache for {ticker}")
+                except Exception as e:
+                    logger.warning(f"Failed to warm {job} cache for {ticker}: {e}")
     
     def __str__(self) -> str:
         """String representation of the provider manager."""
@@ -482,4 +1060,4 @@ class DataProviderManager:
     
     def __repr__(self) -> str:
         """Detailed representation of the provider manager."""
-        return f"DataProviderManager(providers={list(self.providers.keys())}, cache_entries={len(self.cache._cache)})"
\ No newline at end of file
+        return f"DataProviderManager(providers={list(self.providers.keys())}, cache_entries={self.cache.size()})"
\ No newline at end of file
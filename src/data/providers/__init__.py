@@ -1,13 +1,28 @@
-from .base import DataProvider
-from .yahoo_provider import YahooFinanceProvider
-from .stooq_provider import StooqProvider
-from .financialdatasets_provider import FinancialDatasetsProvider
-from .sec_edgar_provider import SECEdgarProvider
-
-__all__ = [
-    "DataProvider",
-    "YahooFinanceProvider", 
-    "StooqProvider",
-    "FinancialDatasetsProvider",
-    "SECEdgarProvider",
-]
\ No newline at end of file
+import importlib
+
+# Provider modules are heavyweight imports (yfinance, pandas-datareader);
+# resolve them lazily (PEP 562) so consumers only pay for the providers
+# they actually instantiate
+_LAZY_IMPORTS = {
+    "DataProvider": ".base",
+    "YahooFinanceProvider": ".yahoo_provider",
+    "StooqProvider": ".stooq_provider",
+    "FinancialDatasetsProvider": ".financialdatasets_provider",
+    "SECEdgarProvider": ".sec_edgar_provider",
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+
+def __getattr__(name):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(module_name, __name__)
+    attr = getattr(module, name)
+    globals()[name] = attr  # Cache so later lookups skip __getattr__
+    return attr
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
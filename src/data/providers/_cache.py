@@ -0,0 +1,77 @@
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import time
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class FileCache:
+    """
+    Small keyed on-disk cache for parsed provider payloads.
+
+    Stores already-parsed Python objects with pickle so a hit skips both
+    the network round trip and JSON parsing. Intended for large,
+    slow-changing payloads (e.g. the multi-megabyte SEC company-facts
+    blobs) that would otherwise be re-downloaded on every call.
+
+    Entries expire after ``ttl_seconds``; expired files are removed
+    lazily on the next lookup. Writes go through a temp file + rename so
+    concurrent readers never see a partial pickle.
+    """
+
+    def __init__(self, cache_dir: str = ".cache/providers", ttl_seconds: float = 86400.0):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path_for(self, key: str) -> str:
+        digest = hashlib.md5(key.encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.pkl")
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached object for key, or None if missing/expired."""
+        path = self._path_for(key)
+        try:
+            age = time.time() - os.path.getmtime(path)
+        except OSError:
+            return None
+
+        if age > self.ttl_seconds:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            logger.debug("Disk cache hit for %s (age %.0fs)", key, age)
+            return value
+        except Exception as e:
+            logger.warning(f"Failed to read cached entry {path}: {e}")
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        """Store value under key, replacing any existing entry."""
+        path = self._path_for(key)
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Failed to write cached entry {path}: {e}")
+
+    def clear(self) -> None:
+        """Remove every entry from the cache directory."""
+        try:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".pkl"):
+                    os.remove(os.path.join(self.cache_dir, name))
+        except OSError as e:
+            logger.warning(f"Failed to clear disk cache {self.cache_dir}: {e}")
@@ -1,6 +1,9 @@
 from abc import ABC, abstractmethod
 from typing import List, Optional
+import numpy as np
 import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter, Retry
 
 from src.data.models import (
     Price,
@@ -32,6 +35,47 @@ class DataProviderNotFoundError(DataProviderError):
     pass
 
 
+def index_to_date_strings(index: pd.DatetimeIndex) -> np.ndarray:
+    """
+    Format a DatetimeIndex as YYYY-MM-DD strings in one NumPy call.
+
+    np.datetime_as_string on day-resolution data produces a fixed-width
+    string array directly, where DatetimeIndex.strftime allocates a
+    Python string object per element. Timezone-aware indexes are
+    flattened to wall time first so the calendar date doesn't shift
+    through UTC.
+    """
+    if getattr(index, "tz", None) is not None:
+        index = index.tz_localize(None)
+    return np.datetime_as_string(index.values.astype("datetime64[D]"))
+
+
+def build_http_session(
+    pool_connections: int = 32,
+    pool_maxsize: int = 64,
+    retry: Optional[Retry] = None,
+) -> requests.Session:
+    """
+    Build a pooled, keep-alive requests session for provider HTTP calls.
+
+    Reusing one session per provider keeps TCP+TLS connections open across
+    calls to the same host, saving a handshake round trip per request.
+    Providers with specific retry needs can pass their own Retry policy.
+    """
+    if retry is None:
+        retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+    adapter = HTTPAdapter(
+        max_retries=retry,
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.setdefault("Connection", "keep-alive")
+    return session
+
+
 class DataProvider(ABC):
     """
     Abstract base class for financial data providers.
@@ -41,9 +85,11 @@ class DataProvider(ABC):
     data format conversion.
     """
     
-    def __init__(self, name: str, api_key: Optional[str] = None):
+    def __init__(self, name: str, api_key: Optional[str] = None,
+                 session: Optional[requests.Session] = None):
         self.name = name
         self.api_key = api_key
+        self._session = session or build_http_session()
         self._is_healthy = True
         self._last_error = None
         
@@ -66,6 +112,27 @@ class DataProvider(ABC):
         """Mark the provider as healthy."""
         self._is_healthy = True
         self._last_error = None
+
+    def close(self):
+        """Close the provider's HTTP session and its pooled connections."""
+        self._session.close()
+    
+    def get_prices_batch(self, tickers: List[str], start_date: str, end_date: str) -> dict:
+        """
+        Fetch price data for several tickers.
+        
+        The default implementation fans out to get_prices per ticker;
+        providers with a true multi-ticker endpoint should override this
+        with a single batched request. Tickers that fail map to an empty
+        list so one bad symbol doesn't sink the batch.
+        """
+        results = {}
+        for ticker in tickers:
+            try:
+                results[ticker] = self.get_prices(ticker, start_date, end_date)
+            except Exception:
+                results[ticker] = []
+        return results
     
     @abstractmethod
     def get_prices(
@@ -255,7 +322,7 @@ class DataProvider(ABC):
         prices = self.get_prices(ticker, start_date, end_date)
         if not prices:
             return pd.DataFrame()
-            
+
         df = pd.DataFrame([p.model_dump() for p in prices])
         df["Date"] = pd.to_datetime(df["time"])
         df.set_index("Date", inplace=True)
@@ -264,7 +331,36 @@ class DataProvider(ABC):
             df[col] = pd.to_numeric(df[col], errors="coerce")
         df.sort_index(inplace=True)
         return df
-    
+
+    @staticmethod
+    def _normalize_price_frame(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Normalize a raw Yahoo-style OHLCV frame to the columnar price layout.
+
+        Produces the same shape as get_price_data_as_dataframe (lowercase
+        columns, Date index, chronological order) straight from the source
+        columns, so providers that already hold a DataFrame can skip the
+        Price-model round trip entirely.
+        """
+        if df.empty:
+            return pd.DataFrame()
+        df = df.dropna(subset=["Open", "Close"])
+        if df.empty:
+            return pd.DataFrame()
+
+        out = pd.DataFrame({
+            "open": df["Open"].to_numpy(dtype="float64"),
+            "close": df["Close"].to_numpy(dtype="float64"),
+            "high": df["High"].to_numpy(dtype="float64"),
+            "low": df["Low"].to_numpy(dtype="float64"),
+            "volume": df["Volume"].fillna(0).to_numpy(dtype="int64"),
+            "time": index_to_date_strings(df.index),
+        })
+        out["Date"] = pd.to_datetime(out["time"])
+        out.set_index("Date", inplace=True)
+        out.sort_index(inplace=True)
+        return out
+
     def supports_feature(self, feature: str) -> bool:
         """
         Check if this provider supports a specific feature.
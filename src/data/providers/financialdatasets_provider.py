@@ -1,7 +1,8 @@
 import os
-import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional
 import requests
+from requests.adapters import HTTPAdapter, Retry
 
 from .base import (
     DataProvider,
@@ -35,67 +36,93 @@ class FinancialDatasetsProvider(DataProvider):
     for advanced features not available in free providers.
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, session=None):
         api_key = api_key or os.environ.get("FINANCIAL_DATASETS_API_KEY")
-        super().__init__("FinancialDatasets.ai", api_key)
+        super().__init__("FinancialDatasets.ai", api_key, session=session)
         self.base_url = "https://api.financialdatasets.ai"
         self.max_retries = 3
-        
-    def _make_request(self, url: str, method: str = "GET", json_data: dict = None) -> requests.Response:
-        """Make a request to the FinancialDatasets API with rate limiting."""
-        headers = {}
         if self.api_key:
-            headers["X-API-KEY"] = self.api_key
-        
-        last_exception = None
-        
-        for attempt in range(self.max_retries + 1):
-            try:
-                if method.upper() == "POST":
-                    response = requests.post(url, headers=headers, json=json_data)
-                else:
-                    response = requests.get(url, headers=headers)
-                
-                if response.status_code == 429 and attempt < self.max_retries:
-                    # Linear backoff: 60s, 90s, 120s, 150s...
-                    delay = 60 + (30 * attempt)
-                    print(f"FinancialDatasets rate limited. Waiting {delay}s before retrying...")
-                    time.sleep(delay)
-                    continue
-                elif response.status_code == 404:
-                    raise DataProviderNotFoundError(f"Data not found: {response.text}")
-                elif response.status_code != 200:
-                    raise DataProviderError(f"API error {response.status_code}: {response.text}")
-                
-                self.mark_healthy()
-                return response
-                
-            except requests.exceptions.RequestException as e:
-                last_exception = e
-                if attempt < self.max_retries:
-                    delay = 30 * (attempt + 1)
-                    print(f"FinancialDatasets request failed. Retrying in {delay}s...")
-                    time.sleep(delay)
-                    continue
-                else:
-                    self.mark_unhealthy(e)
-                    raise DataProviderError(f"Request failed: {e}")
-        
-        # All retries failed
-        self.mark_unhealthy(last_exception)
-        raise DataProviderRateLimitError(f"Rate limit exceeded after {self.max_retries} retries")
+            # Set once on the pooled session instead of per request
+            self._session.headers["X-API-KEY"] = self.api_key
+        # Retries (429/5xx, jittered backoff, Retry-After honored) run
+        # inside urllib3; the line-items search POST is an idempotent
+        # query, so it is safe to retry alongside GETs
+        retry = Retry(
+            total=self.max_retries,
+            backoff_factor=0.5,
+            backoff_jitter=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            respect_retry_after_header=True,
+            allowed_methods=frozenset(["GET", "POST"]),
+        )
+        self._session.mount("https://", HTTPAdapter(max_retries=retry))
+
+    def _make_request(self, url: str, method: str = "GET", json_data: dict = None, params: dict = None) -> requests.Response:
+        """Make a request to the FinancialDatasets API with rate limiting.
+
+        Retries (429 and transient 5xx, with jittered exponential backoff
+        and Retry-After support) are handled by urllib3 inside the pooled
+        adapter, so this only maps terminal outcomes to provider errors.
+        Query arguments go through params= so requests urlencodes them.
+        """
+        try:
+            if method.upper() == "POST":
+                response = self._session.post(url, json=json_data)
+            else:
+                response = self._session.get(url, params=params)
+        except requests.exceptions.RetryError as e:
+            self.mark_unhealthy(e)
+            raise DataProviderRateLimitError(f"Rate limit exceeded after {self.max_retries} retries")
+        except requests.exceptions.RequestException as e:
+            self.mark_unhealthy(e)
+            raise DataProviderError(f"Request failed: {e}")
+
+        if response.status_code == 404:
+            raise DataProviderNotFoundError(f"Data not found: {response.text}")
+        elif response.status_code != 200:
+            raise DataProviderError(f"API error {response.status_code}: {response.text}")
+
+        self.mark_healthy()
+        return response
     
     def get_prices(self, ticker: str, start_date: str, end_date: str) -> List[Price]:
         """Fetch price data from FinancialDatasets API."""
-        url = f"{self.base_url}/prices/?ticker={ticker}&interval=day&interval_multiplier=1&start_date={start_date}&end_date={end_date}"
+        url = f"{self.base_url}/prices/"
+        params = {
+            "ticker": ticker,
+            "interval": "day",
+            "interval_multiplier": 1,
+            "start_date": start_date,
+            "end_date": end_date,
+        }
         
         try:
-            response = self._make_request(url)
-            price_response = PriceResponse(**response.json())
+            response = self._make_request(url, params=params)
+            price_response = PriceResponse.model_validate_json(response.content)
             return price_response.prices
         except Exception as e:
             raise e
     
+    def get_prices_batch(self, tickers: List[str], start_date: str, end_date: str) -> dict:
+        """
+        Fetch prices for several tickers concurrently.
+
+        The API has no multi-ticker prices endpoint, so wall time for N
+        tickers is N sequential round trips by default. Fanning out over
+        the pooled keep-alive session makes it roughly one round trip.
+        """
+        if len(tickers) <= 1:
+            return super().get_prices_batch(tickers, start_date, end_date)
+
+        def fetch_one(ticker):
+            try:
+                return self.get_prices(ticker, start_date, end_date)
+            except Exception:
+                return []
+
+        with ThreadPoolExecutor(max_workers=min(10, len(tickers))) as executor:
+            return dict(zip(tickers, executor.map(fetch_one, tickers)))
+
     def get_financial_metrics(
         self,
         ticker: str,
@@ -104,11 +131,17 @@ class FinancialDatasetsProvider(DataProvider):
         limit: int = 10,
     ) -> List[FinancialMetrics]:
         """Fetch financial metrics from FinancialDatasets API."""
-        url = f"{self.base_url}/financial-metrics/?ticker={ticker}&report_period_lte={end_date}&limit={limit}&period={period}"
+        url = f"{self.base_url}/financial-metrics/"
+        params = {
+            "ticker": ticker,
+            "report_period_lte": end_date,
+            "limit": limit,
+            "period": period,
+        }
         
         try:
-            response = self._make_request(url)
-            metrics_response = FinancialMetricsResponse(**response.json())
+            response = self._make_request(url, params=params)
+            metrics_response = FinancialMetricsResponse.model_validate_json(response.content)
             return metrics_response.financial_metrics
         except Exception as e:
             raise e
@@ -121,14 +154,15 @@ class FinancialDatasetsProvider(DataProvider):
         limit: int = 1000,
     ) -> List[CompanyNews]:
         """Fetch company news from FinancialDatasets API."""
-        url = f"{self.base_url}/news/?ticker={ticker}&end_date={end_date}"
+        url = f"{self.base_url}/news/"
+        params = {"ticker": ticker, "end_date": end_date}
         if start_date:
-            url += f"&start_date={start_date}"
-        url += f"&limit={limit}"
+            params["start_date"] = start_date
+        params["limit"] = limit
         
         try:
-            response = self._make_request(url)
-            news_response = CompanyNewsResponse(**response.json())
+            response = self._make_request(url, params=params)
+            news_response = CompanyNewsResponse.model_validate_json(response.content)
             return news_response.news
         except Exception as e:
             raise e
@@ -141,14 +175,15 @@ class FinancialDatasetsProvider(DataProvider):
         limit: int = 1000,
     ) -> List[InsiderTrade]:
         """Fetch insider trades from FinancialDatasets API."""
-        url = f"{self.base_url}/insider-trades/?ticker={ticker}&filing_date_lte={end_date}"
+        url = f"{self.base_url}/insider-trades/"
+        params = {"ticker": ticker, "filing_date_lte": end_date}
         if start_date:
-            url += f"&filing_date_gte={start_date}"
-        url += f"&limit={limit}"
+            params["filing_date_gte"] = start_date
+        params["limit"] = limit
         
         try:
-            response = self._make_request(url)
-            trades_response = InsiderTradeResponse(**response.json())
+            response = self._make_request(url, params=params)
+            trades_response = InsiderTradeResponse.model_validate_json(response.content)
             return trades_response.insider_trades
         except Exception as e:
             raise e
@@ -174,18 +209,18 @@ class FinancialDatasetsProvider(DataProvider):
         
         try:
             response = self._make_request(url, method="POST", json_data=body)
-            search_response = LineItemResponse(**response.json())
+            search_response = LineItemResponse.model_validate_json(response.content)
             return search_response.search_results
         except Exception as e:
             raise e
     
     def get_company_facts(self, ticker: str) -> Optional[CompanyFacts]:
         """Fetch company facts from FinancialDatasets API."""
-        url = f"{self.base_url}/company/facts/?ticker={ticker}"
+        url = f"{self.base_url}/company/facts/"
         
         try:
-            response = self._make_request(url)
-            facts_response = CompanyFactsResponse(**response.json())
+            response = self._make_request(url, params={"ticker": ticker})
+            facts_response = CompanyFactsResponse.model_validate_json(response.content)
             return facts_response.company_facts
         except Exception as e:
             raise e
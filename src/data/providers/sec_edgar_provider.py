@@ -1,9 +1,17 @@
+import json
 import requests
+import threading
 import time
 import logging
-from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+from bisect import bisect_right
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import datetime
 
+from requests.adapters import HTTPAdapter, Retry
+
+from ._cache import FileCache
 from .base import (
     DataProvider,
     DataProviderError,
@@ -22,6 +30,17 @@ from src.data.models import (
 
 logger = logging.getLogger(__name__)
 
+# companyfacts payloads are multi-megabyte and number-heavy; orjson decodes
+# them several times faster than stdlib json when it is available
+try:
+    import orjson
+
+    def _loads(content: bytes):
+        return orjson.loads(content)
+except ImportError:  # pragma: no cover - depends on environment
+    def _loads(content: bytes):
+        return json.loads(content)
+
 
 class SECEdgarProvider(DataProvider):
     """
@@ -37,18 +56,52 @@ class SECEdgarProvider(DataProvider):
     - Historical data from 10-K/10-Q filings
     - Real-time updates
     """
-    
-    def __init__(self):
-        super().__init__("SEC EDGAR")
+
+    # Process-wide ticker -> CIK map built from company_tickers.json on
+    # first use; shared across instances so the ~1 MB listing is fetched
+    # and indexed at most once per process
+    _ticker_cik_cache: Optional[Dict[str, str]] = None
+    _ticker_cik_lock = threading.Lock()
+
+    def __init__(self, session=None):
+        super().__init__("SEC EDGAR", session=session)
         self.base_url = "https://data.sec.gov"
         self.max_retries = 3
         self.timeout = 30
+        # SEC allows at most 10 requests per second; a sliding window of
+        # the last 10 request times lets sparse traffic and short bursts
+        # through with zero sleep while still capping sustained rate
+        self._request_timestamps = deque(maxlen=10)
+        self._rate_lock = threading.Lock()
+        # Retries (429/5xx, jittered backoff, Retry-After honored) run
+        # inside urllib3 on the pooled connection
+        retry = Retry(
+            total=self.max_retries,
+            backoff_factor=0.5,
+            backoff_jitter=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            respect_retry_after_header=True,
+        )
+        self._session.mount("https://", HTTPAdapter(max_retries=retry))
+        # Company-facts blobs are multi-megabyte and only change on filing
+        # cadence; keep parsed copies on disk for a day so repeated
+        # backtests read from local disk instead of re-downloading
+        self._facts_cache = FileCache(
+            cache_dir=".cache/providers/sec_edgar", ttl_seconds=86400.0
+        )
+        # In-memory LRU of parsed facts dicts so repeated calls for the
+        # same CIK skip even the disk read and unpickle
+        self._facts_memo: OrderedDict = OrderedDict()
+        self._facts_memo_max = 64
+        self._facts_memo_lock = threading.Lock()
         
         # Request headers required by SEC
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Compatible Research Bot) Contact: research@example.com",
             "Accept": "application/json",
         }
+        # Apply the static headers once; every pooled request inherits them
+        self._session.headers.update(self.headers)
         
         # Map common line items to SEC XBRL concepts
         self.line_item_mappings = {
@@ -76,6 +129,22 @@ class SECEdgarProvider(DataProvider):
             "financing_cash_flow": ["NetCashProvidedByUsedInFinancingActivities"],
         }
         
+        # Union of XBRL concepts the mappings can ever reference; used to
+        # slim parsed facts payloads down to the ~5-10% we can serve
+        self._mapped_concepts = frozenset(
+            concept
+            for concepts in self.line_item_mappings.values()
+            for concept in concepts
+        )
+
+        # Reverse index: concept -> [(priority_rank, line_item), ...],
+        # built once so extraction can walk the facts dict in one pass
+        # instead of probing every concept per requested item
+        self._concept_to_items = defaultdict(list)
+        for item, concepts in self.line_item_mappings.items():
+            for rank, concept in enumerate(concepts):
+                self._concept_to_items[concept].append((rank, item))
+
         # Fallback ticker to CIK mapping for common stocks
         # This helps when the SEC API is blocking requests to company_tickers.json
         self.ticker_to_cik_fallback = {
@@ -101,41 +170,47 @@ class SECEdgarProvider(DataProvider):
             "ABBV": "0001551152",
         }
     
+    def _pace_request(self):
+        """Admit the request once fewer than 10 ran in the last second.
+
+        Sparse traffic and bursts of up to 10 proceed without sleeping;
+        only sustained load waits, and holding the lock through the
+        sleep naturally queues concurrent callers behind the window.
+        """
+        with self._rate_lock:
+            now = time.monotonic()
+            if len(self._request_timestamps) == self._request_timestamps.maxlen:
+                wait = 1.0 - (now - self._request_timestamps[0])
+                if wait > 0:
+                    time.sleep(wait)
+                    now = time.monotonic()
+            self._request_timestamps.append(now)
+
     def _make_request(self, url: str) -> requests.Response:
-        """Make a request to the SEC API with proper rate limiting and error handling."""
-        last_exception = None
-        
-        for attempt in range(self.max_retries):
-            try:
-                # SEC recommends no more than 10 requests per second
-                time.sleep(0.1)  
-                
-                response = requests.get(url, headers=self.headers, timeout=self.timeout)
-                
-                if response.status_code == 200:
-                    return response
-                elif response.status_code == 404:
-                    raise DataProviderNotFoundError(f"Data not found: {url}")
-                elif response.status_code == 429:
-                    wait_time = 2 ** attempt
-                    logger.warning(f"SEC API rate limit hit, waiting {wait_time} seconds")
-                    time.sleep(wait_time)
-                    last_exception = DataProviderRateLimitError("SEC API rate limit exceeded")
-                    continue
-                else:
-                    raise DataProviderError(f"SEC API returned status {response.status_code}: {response.text}")
-                    
-            except requests.exceptions.Timeout:
-                last_exception = DataProviderTimeoutError(f"Request to SEC API timed out after {self.timeout} seconds")
-            except requests.exceptions.RequestException as e:
-                last_exception = DataProviderError(f"Request to SEC API failed: {e}")
-            
-            if attempt < self.max_retries - 1:
-                wait_time = 2 ** attempt
-                logger.warning(f"Request failed (attempt {attempt + 1}), retrying in {wait_time} seconds: {last_exception}")
-                time.sleep(wait_time)
-        
-        raise last_exception or DataProviderError("All requests to SEC API failed")
+        """Make a request to the SEC API with proper rate limiting and error handling.
+
+        Retries (429 and transient 5xx, with jittered exponential backoff
+        and Retry-After support) are handled by urllib3 inside the pooled
+        adapter, so this only maps terminal outcomes to provider errors.
+        """
+        self._pace_request()
+
+        try:
+            response = self._session.get(url, timeout=self.timeout)
+        except requests.exceptions.Timeout:
+            raise DataProviderTimeoutError(f"Request to SEC API timed out after {self.timeout} seconds")
+        except requests.exceptions.RetryError:
+            raise DataProviderRateLimitError("SEC API rate limit exceeded")
+        except requests.exceptions.RequestException as e:
+            raise DataProviderError(f"Request to SEC API failed: {e}")
+
+        if response.status_code == 200:
+            return response
+        elif response.status_code == 404:
+            raise DataProviderNotFoundError(f"Data not found: {url}")
+        elif response.status_code == 429:
+            raise DataProviderRateLimitError("SEC API rate limit exceeded")
+        raise DataProviderError(f"SEC API returned status {response.status_code}: {response.text}")
     
     def _get_cik_from_ticker(self, ticker: str) -> Optional[str]:
         """Convert ticker symbol to CIK using fallback mapping and SEC API."""
@@ -148,36 +223,122 @@ class SECEdgarProvider(DataProvider):
             return cik
         
         try:
-            # Try the SEC API as a fallback
-            url = f"{self.base_url}/files/company_tickers.json"
-            response = self._make_request(url)
-            data = response.json()
-            
-            # Search for the ticker in the company tickers data
-            for entry in data.values():
-                if entry.get("ticker", "").upper() == ticker_upper:
-                    cik = str(entry.get("cik_str", "")).zfill(10)  # Pad with zeros
-                    logger.debug(f"Found CIK {cik} for ticker {ticker} via SEC API")
-                    return cik
-                    
+            cik = self._get_ticker_cik_map().get(ticker_upper)
+            if cik:
+                logger.debug(f"Found CIK {cik} for ticker {ticker} via SEC API")
+                return cik
         except Exception as e:
             logger.debug(f"SEC API lookup failed for ticker {ticker}: {e}")
-        
+
         logger.warning(f"Could not find CIK for ticker {ticker} in fallback mapping or SEC API")
         return None
+
+    def _get_ticker_cik_map(self) -> Dict[str, str]:
+        """Build the ticker -> CIK index once; O(1) lookups afterwards."""
+        cache = SECEdgarProvider._ticker_cik_cache
+        if cache is not None:
+            return cache
+
+        with SECEdgarProvider._ticker_cik_lock:
+            if SECEdgarProvider._ticker_cik_cache is not None:
+                return SECEdgarProvider._ticker_cik_cache
+
+            data = self._facts_cache.get("company_tickers")
+            if data is None:
+                url = f"{self.base_url}/files/company_tickers.json"
+                response = self._make_request(url)
+                data = _loads(response.content)
+                self._facts_cache.set("company_tickers", data)
+
+            SECEdgarProvider._ticker_cik_cache = {
+                entry.get("ticker", "").upper(): str(entry.get("cik_str", "")).zfill(10)
+                for entry in data.values()
+            }
+            return SECEdgarProvider._ticker_cik_cache
     
-    def _get_company_facts_data(self, cik: str) -> Optional[Dict[str, Any]]:
-        """Get the full company facts data from SEC API."""
-        try:
-            url = f"{self.base_url}/api/xbrl/companyfacts/CIK{cik}.json"
-            response = self._make_request(url)
-            return response.json()
-        except DataProviderNotFoundError:
-            logger.debug(f"No company facts found for CIK {cik}")
-            return None
-        except Exception as e:
-            logger.error(f"Failed to get company facts for CIK {cik}: {e}")
-            return None
+    def _slim_company_facts(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Drop everything a line-item search can never reference.
+
+        Company-facts payloads run to tens of megabytes parsed, but the
+        mappings only ever touch a few dozen US-GAAP concepts; keeping
+        just those (plus the entity name) shrinks the retained dict to a
+        few percent of the original.
+        """
+        us_gaap = data.get("facts", {}).get("us-gaap", {})
+        kept = {c: us_gaap[c] for c in self._mapped_concepts if c in us_gaap}
+        return {
+            "entityName": data.get("entityName", ""),
+            "facts": {"us-gaap": kept},
+        }
+
+    def _get_company_facts_data(self, cik: str, slim: bool = True) -> Optional[Dict[str, Any]]:
+        """Get company facts data from SEC API.
+
+        With slim=True (the default) the result is reduced to the mapped
+        concepts and served from the in-memory LRU. Callers that query
+        exact XBRL tags outside line_item_mappings must pass slim=False
+        to get the full payload (disk-cached, but not held in memory).
+        """
+        if slim:
+            with self._facts_memo_lock:
+                if cik in self._facts_memo:
+                    self._facts_memo.move_to_end(cik)
+                    return self._facts_memo[cik]
+
+        cache_key = f"companyfacts|{cik}"
+        data = self._facts_cache.get(cache_key)
+        if data is None:
+            try:
+                url = f"{self.base_url}/api/xbrl/companyfacts/CIK{cik}.json"
+                response = self._make_request(url)
+                data = _loads(response.content)
+                self._facts_cache.set(cache_key, data)
+            except DataProviderNotFoundError:
+                logger.debug(f"No company facts found for CIK {cik}")
+                return None
+            except Exception as e:
+                logger.error(f"Failed to get company facts for CIK {cik}: {e}")
+                return None
+
+        if not slim:
+            return data
+
+        slimmed = self._slim_company_facts(data)
+        self._memoize_facts(cik, slimmed)
+        return slimmed
+
+    def prefetch(self, tickers: List[str]) -> None:
+        """
+        Warm the CIK and company-facts caches for a ticker universe.
+
+        Backtests over a fixed set of tickers otherwise pay the full
+        serialized round-trip cost on each ticker's first line-item
+        lookup. Fetching in parallel stays within the 10 req/s limit
+        because every request goes through the shared pacing gate;
+        failures are logged and skipped so one bad ticker doesn't stop
+        the warm-up.
+        """
+        if not tickers:
+            return
+
+        def warm(ticker: str) -> None:
+            try:
+                cik = self._get_cik_from_ticker(ticker)
+                if cik:
+                    self._get_company_facts_data(cik)
+            except Exception as e:
+                logger.debug("Prefetch failed for %s: %s", ticker, e)
+
+        with ThreadPoolExecutor(max_workers=min(10, len(tickers))) as executor:
+            list(executor.map(warm, tickers))
+
+    def _memoize_facts(self, cik: str, data: Dict[str, Any]) -> None:
+        """Keep the slimmed facts dict in the per-instance LRU."""
+        with self._facts_memo_lock:
+            self._facts_memo[cik] = data
+            self._facts_memo.move_to_end(cik)
+            while len(self._facts_memo) > self._facts_memo_max:
+                self._facts_memo.popitem(last=False)
     
     def _extract_line_items_from_facts(
         self, 
@@ -190,89 +351,148 @@ class SECEdgarProvider(DataProvider):
     ) -> List[LineItem]:
         """Extract specific line items from SEC company facts data."""
         results = []
-        
+
         # Get US-GAAP facts
         us_gaap = company_data.get("facts", {}).get("us-gaap", {})
         if not us_gaap:
             logger.warning(f"No US-GAAP data found for ticker {ticker}")
             return results
-        
-        # Convert end_date to datetime for comparison
+
+        # Validate the date format once; after that, ISO YYYY-MM-DD strings
+        # compare correctly lexicographically, so no per-filing strptime
         try:
-            end_dt = datetime.strptime(end_date, "%Y-%m-%d")
+            datetime.strptime(end_date, "%Y-%m-%d")
         except ValueError:
             logger.error(f"Invalid end_date format: {end_date}")
             return results
-        
+
+        # Sorted (end-dates, filings) per concept/unit, built lazily so
+        # line items that share a concept don't rescan the filing list
+        sorted_filings: Dict[tuple, tuple] = {}
+        # Final filing selections per concept/unit: end_date, period, and
+        # limit are fixed for the whole call, so overlapping items (e.g.
+        # revenue and total_revenue both resolving to Revenues) reuse the
+        # filtered result and only differ in the attribute they set
+        selected_filings: Dict[tuple, list] = {}
+
+        # Resolve the winning concept per requested item in one pass over
+        # us_gaap using the precomputed reverse index: the lowest rank
+        # (position in the mapping list) present in the data wins. Items
+        # outside the mappings match their own name as a raw XBRL tag.
+        raw_tags = {
+            item: item for item in line_items
+            if item.lower() not in self.line_item_mappings
+        }
+        best: Dict[str, tuple] = {}  # requested item -> (rank, concept, concept_data)
+        for concept, concept_data in us_gaap.items():
+            for rank, mapped_item in self._concept_to_items.get(concept, ()):
+                for requested_item in line_items:
+                    if requested_item.lower() == mapped_item:
+                        current = best.get(requested_item)
+                        if current is None or rank < current[0]:
+                            best[requested_item] = (rank, concept, concept_data)
+            if concept in raw_tags:
+                best.setdefault(concept, (0, concept, concept_data))
+
         for requested_item in line_items:
-            # Get possible SEC concepts for this line item
-            possible_concepts = self.line_item_mappings.get(requested_item.lower(), [requested_item])
-            
-            for concept in possible_concepts:
-                if concept in us_gaap:
-                    concept_data = us_gaap[concept]
-                    units = concept_data.get("units", {})
-                    
-                    # Prefer USD values, fall back to shares or other units
-                    unit_priority = ["USD", "USD-per-shares", "shares", "pure"]
-                    selected_unit = None
-                    
-                    for unit in unit_priority:
-                        if unit in units:
-                            selected_unit = unit
-                            break
-                    
-                    if not selected_unit:
-                        # Take the first available unit
-                        selected_unit = next(iter(units.keys())) if units else None
-                    
-                    if selected_unit and selected_unit in units:
-                        # Get the most recent filings within our date range
-                        filings = units[selected_unit]
-                        valid_filings = []
-                        
-                        for filing in filings:
-                            filing_end = filing.get("end")
-                            if filing_end:
-                                try:
-                                    filing_end_dt = datetime.strptime(filing_end, "%Y-%m-%d")
-                                    if filing_end_dt <= end_dt:
-                                        # Filter by period type if specified
-                                        form = filing.get("form", "").upper()
-                                        if period == "annual" and "10-K" not in form:
-                                            continue
-                                        elif period == "quarterly" and "10-Q" not in form:
-                                            continue
-                                        
-                                        valid_filings.append(filing)
-                                except ValueError:
-                                    continue
-                        
-                        # Sort by end date descending and take the most recent ones
-                        valid_filings.sort(key=lambda x: x.get("end", ""), reverse=True)
-                        valid_filings = valid_filings[:limit]
-                        
-                        for filing in valid_filings:
-                            line_item = LineItem(
-                                ticker=ticker,
-                                report_period=filing.get("end", ""),
-                                period=filing.get("form", "").replace("-", "").lower(),
-                                currency=selected_unit if selected_unit == "USD" else "USD"
-                            )
-                            
-                            # Add the specific line item value with dynamic field
-                            setattr(line_item, requested_item.lower().replace(" ", "_"), filing.get("val"))
-                            setattr(line_item, "concept", concept)
-                            setattr(line_item, "form", filing.get("form"))
-                            setattr(line_item, "filed", filing.get("filed"))
-                            setattr(line_item, "frame", filing.get("frame"))
-                            
-                            results.append(line_item)
-                        
-                        # Found data for this concept, move to next requested item
+            resolved = best.get(requested_item)
+            if resolved is None:
+                continue
+            _, concept, concept_data = resolved
+            units = concept_data.get("units", {})
+
+            # Prefer USD values, fall back to shares or other units
+            unit_priority = ["USD", "USD-per-shares", "shares", "pure"]
+            selected_unit = None
+
+            for unit in unit_priority:
+                if unit in units:
+                    selected_unit = unit
+                    break
+
+            if not selected_unit:
+                # Take the first available unit
+                selected_unit = next(iter(units.keys())) if units else None
+
+            if selected_unit and selected_unit in units:
+                index_key = (concept, selected_unit)
+                valid_filings = selected_filings.get(index_key)
+                if valid_filings is not None:
+                    self._append_line_items(
+                        results, valid_filings, ticker, requested_item, concept, selected_unit
+                    )
+                    continue
+
+                cached = sorted_filings.get(index_key)
+                if cached is None:
+                    # Uppercase the form once here so the period filter
+                    # below never re-does it per filing per item
+                    entries = sorted(
+                        (
+                            (f["end"], f.get("form", "").upper(), f)
+                            for f in units[selected_unit]
+                            if f.get("end")
+                        ),
+                        key=lambda triple: triple[0],
+                    )
+                    ends = [end for end, _, _ in entries]
+                    cached = (ends, entries)
+                    sorted_filings[index_key] = cached
+                ends, entries = cached
+
+                # Everything at or before end_date, newest first;
+                # apply the period filter while collecting so we
+                # stop as soon as `limit` filings are found
+                cutoff = bisect_right(ends, end_date)
+                valid_filings = []
+                for i in range(cutoff - 1, -1, -1):
+                    _, form, filing = entries[i]
+                    if period == "annual" and "10-K" not in form:
+                        continue
+                    elif period == "quarterly" and "10-Q" not in form:
+                        continue
+                    valid_filings.append(filing)
+                    if len(valid_filings) == limit:
                         break
-        
+
+                selected_filings[index_key] = valid_filings
+                self._append_line_items(
+                    results, valid_filings, ticker, requested_item, concept, selected_unit
+                )
+
         return results
+
+    def _append_line_items(
+        self,
+        results: List[LineItem],
+        valid_filings: List[Dict[str, Any]],
+        ticker: str,
+        requested_item: str,
+        concept: str,
+        selected_unit: str,
+    ) -> None:
+        """Turn a filtered filing selection into LineItem rows.
+
+        Values come straight from the (already well-typed) SEC blob, so
+        model_construct skips per-row validation and the dynamic fields
+        ride along as extra attributes.
+        """
+        value_field = requested_item.lower().replace(" ", "_")
+        for filing in valid_filings:
+            form = filing.get("form", "")
+            results.append(LineItem.model_construct(
+                ticker=ticker,
+                report_period=filing.get("end", ""),
+                period=form.replace("-", "").lower(),
+                currency=selected_unit if selected_unit == "USD" else "USD",
+                **{
+                    value_field: filing.get("val"),
+                    "concept": concept,
+                    "form": filing.get("form"),
+                    "filed": filing.get("filed"),
+                    "frame": filing.get("frame"),
+                },
+            ))
     
     def supports_feature(self, feature: str) -> bool:
         """SEC EDGAR primarily supports line_items and company_facts."""
@@ -323,9 +543,11 @@ class SECEdgarProvider(DataProvider):
             cik = self._get_cik_from_ticker(ticker)
             if not cik:
                 raise DataProviderNotFoundError(f"Could not find SEC CIK for ticker {ticker}")
-            
-            # Get company facts data
-            company_data = self._get_company_facts_data(cik)
+
+            # Unmapped items are treated as raw XBRL tags and need the
+            # full payload; mapped items are served from the slim copy
+            slim = all(item.lower() in self.line_item_mappings for item in line_items)
+            company_data = self._get_company_facts_data(cik, slim=slim)
             if not company_data:
                 raise DataProviderNotFoundError(f"No SEC filing data found for ticker {ticker}")
             
@@ -344,7 +566,39 @@ class SECEdgarProvider(DataProvider):
                 raise
             logger.error(f"Unexpected error searching line items for {ticker}: {e}")
             raise DataProviderError(f"Failed to search line items: {e}")
-    
+
+    def search_line_items_batch(
+        self,
+        ticker: str,
+        requests_list: List[Tuple[List[str], str, str, int]],
+    ) -> List[List[LineItem]]:
+        """
+        Run several line-item searches against one ticker's facts.
+
+        Each entry in requests_list is (line_items, end_date, period,
+        limit). The CIK is resolved and the facts blob fetched/parsed
+        once, so N sub-requests cost one HTTP round trip instead of N.
+        """
+        cik = self._get_cik_from_ticker(ticker)
+        if not cik:
+            raise DataProviderNotFoundError(f"Could not find SEC CIK for ticker {ticker}")
+
+        slim = all(
+            item.lower() in self.line_item_mappings
+            for line_items, _, _, _ in requests_list
+            for item in line_items
+        )
+        company_data = self._get_company_facts_data(cik, slim=slim)
+        if not company_data:
+            raise DataProviderNotFoundError(f"No SEC filing data found for ticker {ticker}")
+
+        return [
+            self._extract_line_items_from_facts(
+                company_data, ticker, line_items, end_date, period, limit
+            )
+            for line_items, end_date, period, limit in requests_list
+        ]
+
     def get_company_facts(self, ticker: str) -> Optional[CompanyFacts]:
         """Get basic company information from SEC data."""
         try:
@@ -1,8 +1,10 @@
-import time
+import functools
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional
 import pandas as pd
-from requests.exceptions import HTTPError, ConnectionError
+from requests.adapters import HTTPAdapter, Retry
+from requests.exceptions import HTTPError, ConnectionError, RetryError
 
 try:
     import pandas_datareader.data as pdr
@@ -18,7 +20,10 @@ from .base import (
     DataProviderRateLimitError,
     DataProviderTimeoutError,
     DataProviderNotFoundError,
+    index_to_date_strings,
 )
+from pydantic import TypeAdapter
+
 from src.data.models import (
     Price,
     FinancialMetrics,
@@ -28,6 +33,26 @@ from src.data.models import (
     CompanyFacts,
 )
 
+# Validates whole price lists in one pydantic-core call
+_PRICE_LIST = TypeAdapter(List[Price])
+
+# pandas-datareader surfaces most STOOQ failures as bare Exceptions, so
+# classification falls back to message markers
+_RATE_LIMIT_MARKERS = ('Too Many Requests', '429')
+_NOT_FOUND_MARKERS = ('no data fetched', 'not found')
+
+
+@functools.lru_cache(maxsize=4096)
+def _stooq_symbol(ticker: str) -> str:
+    """
+    Convert a ticker symbol to STOOQ format if needed.
+    STOOQ uses different conventions for some tickers.
+    """
+    # Add .US suffix for US stocks if not already present
+    if '.' not in ticker and len(ticker) <= 5:
+        return f"{ticker}.US"
+    return ticker
+
 
 class StooqProvider(DataProvider):
     """
@@ -40,121 +65,152 @@ class StooqProvider(DataProvider):
     Note: STOOQ has limited fundamental data compared to specialized providers.
     """
     
-    def __init__(self, api_key: Optional[str] = None):
-        super().__init__("STOOQ", api_key)
+    def __init__(self, api_key: Optional[str] = None, session=None):
+        super().__init__("STOOQ", api_key, session=session)
         self.max_retries = 3
         self.retry_delay = 2.0
-        
+
+        # Retries (429/5xx, jittered backoff, Retry-After honored) run
+        # inside urllib3; pandas-datareader issues its requests through
+        # this session, so every STOOQ call gets the policy for free
+        retry = Retry(
+            total=self.max_retries,
+            backoff_factor=self.retry_delay,
+            backoff_jitter=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(max_retries=retry)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+        # Remember which symbol variant worked per ticker so later calls
+        # skip the try-then-fallback double fetch, and remember tickers
+        # that resolved nowhere so they fail fast instead of re-probing
+        self._symbol_map: dict = {}
+        self._not_found: set = set()
+
         if not PANDAS_DATAREADER_AVAILABLE:
             self.mark_unhealthy(ImportError(f"pandas-datareader not available: {_import_error}"))
-        
+
     def _handle_stooq_errors(self, func, *args, **kwargs):
         """
-        Wrapper to handle STOOQ/pandas-datareader errors and implement retry logic.
+        Map STOOQ/pandas-datareader failures to provider errors.
+
+        Retries (429 and transient 5xx, with jittered exponential backoff
+        and Retry-After support) are handled by urllib3 inside the pooled
+        adapter, so this only classifies terminal outcomes.
         """
-        last_exception = None
-        
-        for attempt in range(self.max_retries):
-            try:
-                return func(*args, **kwargs)
-            except HTTPError as e:
-                last_exception = e
-                if e.response.status_code == 429:
-                    # Rate limited
-                    delay = self.retry_delay * (2 ** attempt)  # Exponential backoff
-                    print(f"STOOQ rate limited. Retrying in {delay}s...")
-                    time.sleep(delay)
-                    continue
-                elif e.response.status_code == 404:
-                    # Not found
-                    raise DataProviderNotFoundError(f"STOOQ data not found: {e}")
-                else:
-                    # Other HTTP error
-                    self.mark_unhealthy(e)
-                    raise DataProviderError(f"STOOQ HTTP error: {e}")
-            except ConnectionError as e:
-                last_exception = e
-                if attempt < self.max_retries - 1:
-                    delay = self.retry_delay * (2 ** attempt)
-                    print(f"STOOQ connection error. Retrying in {delay}s...")
-                    time.sleep(delay)
-                    continue
-                else:
-                    self.mark_unhealthy(e)
-                    raise DataProviderError(f"STOOQ connection error: {e}")
-            except Exception as e:
-                last_exception = e
-                if "Too Many Requests" in str(e) or "429" in str(e):
-                    # Rate limited
-                    delay = self.retry_delay * (2 ** attempt)
-                    print(f"STOOQ rate limited. Retrying in {delay}s...")
-                    time.sleep(delay)
-                    continue
-                elif "No data fetched" in str(e) or "not found" in str(e).lower():
-                    # No data available
-                    raise DataProviderNotFoundError(f"STOOQ data not found: {e}")
-                else:
-                    # Other error
-                    break
-        
-        # All retries failed
-        self.mark_unhealthy(last_exception)
-        if "Too Many Requests" in str(last_exception) or "429" in str(last_exception):
-            raise DataProviderRateLimitError(f"STOOQ rate limit exceeded: {last_exception}")
-        else:
-            raise DataProviderError(f"STOOQ error: {last_exception}")
+        try:
+            return func(*args, **kwargs)
+        except HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                # Not found
+                raise DataProviderNotFoundError(f"STOOQ data not found: {e}")
+            self.mark_unhealthy(e)
+            if e.response is not None and e.response.status_code == 429:
+                raise DataProviderRateLimitError(f"STOOQ rate limit exceeded: {e}")
+            raise DataProviderError(f"STOOQ HTTP error: {e}")
+        except RetryError as e:
+            self.mark_unhealthy(e)
+            raise DataProviderRateLimitError(f"STOOQ rate limit exceeded: {e}")
+        except ConnectionError as e:
+            self.mark_unhealthy(e)
+            raise DataProviderError(f"STOOQ connection error: {e}")
+        except Exception as e:
+            msg = str(e)
+            if any(marker in msg.lower() for marker in _NOT_FOUND_MARKERS):
+                # No data available
+                raise DataProviderNotFoundError(f"STOOQ data not found: {e}")
+            self.mark_unhealthy(e)
+            if any(marker in msg for marker in _RATE_LIMIT_MARKERS):
+                raise DataProviderRateLimitError(f"STOOQ rate limit exceeded: {e}")
+            raise DataProviderError(f"STOOQ error: {e}")
     
     def _convert_ticker_for_stooq(self, ticker: str) -> str:
+        """Convert a ticker symbol to STOOQ format if needed."""
+        return _stooq_symbol(ticker)
+
+    @staticmethod
+    def _looks_not_found(error: Exception) -> bool:
+        """Whether an error indicates the symbol has no data, not a transient fault."""
+        msg = str(error).lower()
+        return any(marker in msg for marker in _NOT_FOUND_MARKERS)
+
+    def _fetch_ohlcv(self, ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """Fetch the raw OHLCV frame for a ticker from STOOQ.
+
+        The first successful fetch records which symbol variant worked so
+        later calls go straight to it; tickers that resolved nowhere are
+        negative-cached and fail without another probe.
         """
-        Convert ticker symbol to STOOQ format if needed.
-        STOOQ uses different conventions for some tickers.
-        """
-        # Add .US suffix for US stocks if not already present
-        if '.' not in ticker and len(ticker) <= 5:
-            return f"{ticker}.US"
-        return ticker
-    
+        if ticker in self._not_found:
+            raise DataProviderNotFoundError(f"STOOQ data not found: {ticker}")
+
+        known_symbol = self._symbol_map.get(ticker)
+        if known_symbol is not None:
+            return pdr.DataReader(known_symbol, 'stooq', start_date, end_date,
+                                  session=self._session)
+
+        stooq_ticker = _stooq_symbol(ticker)
+        try:
+            df = pdr.DataReader(stooq_ticker, 'stooq', start_date, end_date,
+                                session=self._session)
+        except Exception as e:
+            # Try without .US suffix if it fails
+            if '.US' not in stooq_ticker:
+                if self._looks_not_found(e):
+                    self._not_found.add(ticker)
+                raise e
+            original_ticker = ticker.replace('.US', '')
+            try:
+                df = pdr.DataReader(original_ticker, 'stooq', start_date, end_date,
+                                    session=self._session)
+            except Exception as fallback_error:
+                if self._looks_not_found(fallback_error):
+                    self._not_found.add(ticker)
+                raise fallback_error
+            self._symbol_map[ticker] = original_ticker
+            return df
+
+        self._symbol_map[ticker] = stooq_ticker
+        return df
+
     def get_prices(self, ticker: str, start_date: str, end_date: str) -> List[Price]:
         """Fetch price data from STOOQ."""
         if not PANDAS_DATAREADER_AVAILABLE:
             raise DataProviderError(f"pandas-datareader not available: {_import_error}")
-            
+
         def _fetch_prices():
-            stooq_ticker = self._convert_ticker_for_stooq(ticker)
-            
-            try:
-                df = pdr.DataReader(stooq_ticker, 'stooq', start_date, end_date)
-            except Exception as e:
-                # Try without .US suffix if it fails
-                if '.US' in stooq_ticker:
-                    original_ticker = ticker.replace('.US', '')
-                    df = pdr.DataReader(original_ticker, 'stooq', start_date, end_date)
-                else:
-                    raise e
-            
+            df = self._fetch_ohlcv(ticker, start_date, end_date)
+
             if df.empty:
                 return []
             
-            # STOOQ data comes in reverse chronological order, so we need to reverse it
-            df = df.sort_index()
-            
-            prices = []
-            for date, row in df.iterrows():
-                # Skip rows with NaN values
-                if pd.isna(row['Open']) or pd.isna(row['Close']):
-                    continue
-                    
-                price = Price(
-                    open=float(row['Open']),
-                    close=float(row['Close']),
-                    high=float(row['High']),
-                    low=float(row['Low']),
-                    volume=int(row['Volume']) if not pd.isna(row['Volume']) else 0,
-                    time=date.strftime('%Y-%m-%d')
+            # STOOQ data comes in reverse chronological order, so we need to reverse it;
+            # the NaN filter, volume fill, and date formatting all run as
+            # single vectorized passes instead of per-row Python branches
+            df = df.sort_index().dropna(subset=['Open', 'Close'])
+            if df.empty:
+                return []
+
+            opens = df['Open'].to_numpy(dtype='float64')
+            highs = df['High'].to_numpy(dtype='float64')
+            lows = df['Low'].to_numpy(dtype='float64')
+            closes = df['Close'].to_numpy(dtype='float64')
+            volumes = df['Volume'].fillna(0).to_numpy(dtype='int64')
+            times = index_to_date_strings(df.index)
+
+            # tolist() converts to native Python scalars in C; the single
+            # validate_python call lets pydantic-core build every row without
+            # a Python-level constructor per Price
+            return _PRICE_LIST.validate_python([
+                {"open": o, "close": c, "high": h, "low": l, "volume": v, "time": t}
+                for o, c, h, l, v, t in zip(
+                    opens.tolist(), closes.tolist(), highs.tolist(),
+                    lows.tolist(), volumes.tolist(), times,
                 )
-                prices.append(price)
-            
-            return prices
+            ])
         
         try:
             prices = self._handle_stooq_errors(_fetch_prices)
@@ -162,7 +218,51 @@ class StooqProvider(DataProvider):
             return prices
         except Exception as e:
             raise e
-    
+
+    def get_price_data_as_dataframe(self, ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """
+        Columnar fast path for price data.
+
+        The base implementation materializes Price models and then turns
+        them back into a frame, paying per-row validation and model_dump
+        cost both ways. STOOQ data already arrives as a DataFrame, so the
+        normalized frame is built directly from its columns.
+        """
+        if not PANDAS_DATAREADER_AVAILABLE:
+            raise DataProviderError(f"pandas-datareader not available: {_import_error}")
+
+        def _fetch_frame():
+            return self._normalize_price_frame(
+                self._fetch_ohlcv(ticker, start_date, end_date))
+
+        try:
+            frame = self._handle_stooq_errors(_fetch_frame)
+            self.mark_healthy()
+            return frame
+        except Exception as e:
+            raise e
+
+    def get_prices_batch(self, tickers: List[str], start_date: str, end_date: str) -> dict:
+        """
+        Fetch prices for several tickers concurrently.
+
+        STOOQ has no multi-ticker endpoint, so the default base
+        implementation serializes N round trips. Fanning out over a small
+        thread pool overlaps those latencies; tickers that fail map to an
+        empty list so one bad symbol doesn't sink the batch.
+        """
+        if len(tickers) <= 1:
+            return super().get_prices_batch(tickers, start_date, end_date)
+
+        def fetch_one(ticker):
+            try:
+                return self.get_prices(ticker, start_date, end_date)
+            except Exception:
+                return []
+
+        with ThreadPoolExecutor(max_workers=min(10, len(tickers))) as executor:
+            return dict(zip(tickers, executor.map(fetch_one, tickers)))
+
     def get_financial_metrics(
         self,
         ticker: str,
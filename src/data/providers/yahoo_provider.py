@@ -2,8 +2,10 @@ import time
 import datetime
 from typing import List, Optional
 import yfinance as yf
+import numpy as np
 import pandas as pd
-from requests.exceptions import HTTPError
+from requests.adapters import HTTPAdapter, Retry
+from requests.exceptions import HTTPError, RetryError
 
 from .base import (
     DataProvider,
@@ -11,7 +13,10 @@ from .base import (
     DataProviderRateLimitError,
     DataProviderTimeoutError,
     DataProviderNotFoundError,
+    index_to_date_strings,
 )
+from pydantic import TypeAdapter
+
 from src.data.models import (
     Price,
     FinancialMetrics,
@@ -21,6 +26,9 @@ from src.data.models import (
     CompanyFacts,
 )
 
+# Validates whole price lists in one pydantic-core call
+_PRICE_LIST = TypeAdapter(List[Price])
+
 
 class YahooFinanceProvider(DataProvider):
     """
@@ -34,77 +42,112 @@ class YahooFinanceProvider(DataProvider):
     Note: Yahoo Finance has informal rate limits and may block excessive requests.
     """
     
-    def __init__(self, api_key: Optional[str] = None):
-        super().__init__("Yahoo Finance", api_key)
+    def __init__(self, api_key: Optional[str] = None, session=None):
+        super().__init__("Yahoo Finance", api_key, session=session)
         self.max_retries = 3
         self.retry_delay = 1.0
-        
+        # Retries (429/5xx, jittered backoff, Retry-After honored) run
+        # inside urllib3; yfinance issues its requests through this
+        # session, so every Yahoo call gets the policy for free
+        retry = Retry(
+            total=self.max_retries,
+            backoff_factor=self.retry_delay,
+            backoff_jitter=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(max_retries=retry)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        # Short-TTL memo for Ticker.info: metrics, facts, and market cap
+        # all read the same summary payload, often for the same ticker in
+        # one workflow, and each uncached read is a full REST round trip
+        self._info_cache: dict = {}
+        self._info_ttl = 300.0
+
+    def _get_info(self, ticker: str) -> dict:
+        """Return Ticker.info for a ticker, memoized for a few minutes.
+
+        The info payload feeds get_financial_metrics, get_company_facts,
+        and get_market_cap; caching it means a mixed feature workflow
+        fetches it once per ticker instead of once per call.
+        """
+        cached = self._info_cache.get(ticker)
+        if cached is not None:
+            fetched_at, info = cached
+            if time.monotonic() - fetched_at < self._info_ttl:
+                return info
+
+        info = yf.Ticker(ticker, session=self._session).info or {}
+        self._info_cache[ticker] = (time.monotonic(), info)
+        return info
+
     def _handle_yfinance_errors(self, func, *args, **kwargs):
         """
-        Wrapper to handle yfinance errors and implement retry logic.
+        Map yfinance failures to provider errors.
+
+        Retries (429 and transient 5xx, with jittered exponential backoff
+        and Retry-After support) are handled by urllib3 inside the pooled
+        adapter that yfinance's requests go through, so this only
+        classifies terminal outcomes.
         """
-        last_exception = None
-        
-        for attempt in range(self.max_retries):
-            try:
-                return func(*args, **kwargs)
-            except HTTPError as e:
-                last_exception = e
-                if e.response.status_code == 429:
-                    # Rate limited
-                    delay = self.retry_delay * (2 ** attempt)  # Exponential backoff
-                    print(f"Yahoo Finance rate limited. Retrying in {delay}s...")
-                    time.sleep(delay)
-                    continue
-                else:
-                    # Other HTTP error
-                    self.mark_unhealthy(e)
-                    raise DataProviderError(f"Yahoo Finance HTTP error: {e}")
-            except Exception as e:
-                last_exception = e
-                if "Too Many Requests" in str(e) or "429" in str(e):
-                    # Rate limited
-                    delay = self.retry_delay * (2 ** attempt)
-                    print(f"Yahoo Finance rate limited. Retrying in {delay}s...")
-                    time.sleep(delay)
-                    continue
-                else:
-                    # Other error
-                    break
-        
-        # All retries failed
-        self.mark_unhealthy(last_exception)
-        if "Too Many Requests" in str(last_exception) or "429" in str(last_exception):
-            raise DataProviderRateLimitError(f"Yahoo Finance rate limit exceeded: {last_exception}")
-        else:
-            raise DataProviderError(f"Yahoo Finance error: {last_exception}")
+        try:
+            return func(*args, **kwargs)
+        except HTTPError as e:
+            self.mark_unhealthy(e)
+            if e.response is not None and e.response.status_code == 429:
+                raise DataProviderRateLimitError(f"Yahoo Finance rate limit exceeded: {e}")
+            raise DataProviderError(f"Yahoo Finance HTTP error: {e}")
+        except RetryError as e:
+            self.mark_unhealthy(e)
+            raise DataProviderRateLimitError(f"Yahoo Finance rate limit exceeded: {e}")
+        except Exception as e:
+            self.mark_unhealthy(e)
+            msg = str(e)
+            if "Too Many Requests" in msg or "429" in msg:
+                raise DataProviderRateLimitError(f"Yahoo Finance rate limit exceeded: {e}")
+            raise DataProviderError(f"Yahoo Finance error: {e}")
     
+    @staticmethod
+    def _prices_from_frame(df: pd.DataFrame) -> List[Price]:
+        """Convert an OHLCV frame to Price rows.
+
+        The NaN filter, volume fill, and date formatting all run as
+        single vectorized passes over column arrays instead of per-row
+        Python branches.
+        """
+        df = df.dropna(subset=['Open', 'Close'])
+        if df.empty:
+            return []
+
+        opens = df['Open'].to_numpy(dtype='float64')
+        highs = df['High'].to_numpy(dtype='float64')
+        lows = df['Low'].to_numpy(dtype='float64')
+        closes = df['Close'].to_numpy(dtype='float64')
+        volumes = df['Volume'].fillna(0).to_numpy(dtype='int64')
+        times = index_to_date_strings(df.index)
+
+        # tolist() converts to native Python scalars in C; the single
+        # validate_python call lets pydantic-core build every row without
+        # a Python-level constructor per Price
+        return _PRICE_LIST.validate_python([
+            {"open": o, "close": c, "high": h, "low": l, "volume": v, "time": t}
+            for o, c, h, l, v, t in zip(
+                opens.tolist(), closes.tolist(), highs.tolist(),
+                lows.tolist(), volumes.tolist(), times,
+            )
+        ])
+
     def get_prices(self, ticker: str, start_date: str, end_date: str) -> List[Price]:
         """Fetch price data from Yahoo Finance."""
         def _fetch_prices():
-            stock = yf.Ticker(ticker)
+            stock = yf.Ticker(ticker, session=self._session)
             df = stock.history(start=start_date, end=end_date, auto_adjust=True, prepost=True)
-            
+
             if df.empty:
                 return []
-            
-            prices = []
-            for date, row in df.iterrows():
-                # Skip rows with NaN values
-                if pd.isna(row['Open']) or pd.isna(row['Close']):
-                    continue
-                    
-                price = Price(
-                    open=float(row['Open']),
-                    close=float(row['Close']),
-                    high=float(row['High']),
-                    low=float(row['Low']),
-                    volume=int(row['Volume']) if not pd.isna(row['Volume']) else 0,
-                    time=date.strftime('%Y-%m-%d')
-                )
-                prices.append(price)
-            
-            return prices
+
+            return self._prices_from_frame(df)
         
         try:
             prices = self._handle_yfinance_errors(_fetch_prices)
@@ -112,6 +155,71 @@ class YahooFinanceProvider(DataProvider):
             return prices
         except Exception as e:
             raise e
+
+    def get_price_data_as_dataframe(self, ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """
+        Columnar fast path for price data.
+
+        The base implementation materializes Price models and then turns
+        them back into a frame, paying per-row validation and model_dump
+        cost both ways. yfinance already returns a DataFrame, so the
+        normalized frame is built directly from its columns.
+        """
+        def _fetch_frame():
+            stock = yf.Ticker(ticker, session=self._session)
+            df = stock.history(start=start_date, end=end_date, auto_adjust=True, prepost=True)
+            return self._normalize_price_frame(df)
+
+        try:
+            frame = self._handle_yfinance_errors(_fetch_frame)
+            self.mark_healthy()
+            return frame
+        except Exception as e:
+            raise e
+
+    def get_prices_batch(self, tickers: List[str], start_date: str, end_date: str) -> dict:
+        """
+        Fetch price data for several tickers in one Yahoo Finance download.
+        
+        yfinance.download retrieves all tickers in a single batched request,
+        so warming N tickers costs one round trip instead of N.
+        """
+        def _fetch_batch():
+            df = yf.download(
+                tickers,
+                start=start_date,
+                end=end_date,
+                auto_adjust=True,
+                group_by='ticker',
+                progress=False,
+                threads=False,
+                session=self._session,
+            )
+            
+            results = {ticker: [] for ticker in tickers}
+            if df is None or df.empty:
+                return results
+            
+            for ticker in tickers:
+                # With group_by='ticker' columns are (ticker, field); a
+                # single-ticker download comes back flat
+                if len(tickers) > 1:
+                    if ticker not in df.columns.get_level_values(0):
+                        continue
+                    ticker_df = df[ticker]
+                else:
+                    ticker_df = df
+                
+                results[ticker] = self._prices_from_frame(ticker_df)
+            
+            return results
+        
+        try:
+            results = self._handle_yfinance_errors(_fetch_batch)
+            self.mark_healthy()
+            return results
+        except Exception as e:
+            raise e
     
     def get_financial_metrics(
         self,
@@ -127,34 +235,57 @@ class YahooFinanceProvider(DataProvider):
         specialized financial data providers. This method returns basic metrics.
         """
         def _fetch_metrics():
-            stock = yf.Ticker(ticker)
-            info = stock.info
-            
+            info = self._get_info(ticker)
+
             if not info:
                 return []
-            
+
             # Get quarterly and annual financials for historical data
+            stock = yf.Ticker(ticker, session=self._session)
             quarterly_financials = stock.quarterly_financials
             quarterly_balance_sheet = stock.quarterly_balance_sheet
-            quarterly_cashflow = stock.quarterly_cashflow
-            
+
             metrics = []
-            
+
             # Current metrics from info
             current_metric = self._build_financial_metric_from_info(ticker, info, end_date, period)
             if current_metric:
                 metrics.append(current_metric)
-            
-            # Historical quarterly metrics (if available and requested)
+
+            # Historical quarterly metrics (if available and requested).
+            # Reindexing to the wanted rows and transposing once turns the
+            # per-period extraction into array math: the ratios for every
+            # period are computed in three vectorized passes, with zero
+            # and missing denominators masked to NaN instead of guarded
+            # by per-period Python branches.
             if period in ["quarterly", "ttm"] and not quarterly_financials.empty:
-                for i, date in enumerate(quarterly_financials.columns[:min(limit-1, len(quarterly_financials.columns))]):
+                fin_T = quarterly_financials.reindex(
+                    ['Total Revenue', 'Net Income']).T
+                bs_T = quarterly_balance_sheet.reindex(
+                    ['Total Assets', 'Total Stockholder Equity']).T
+                joined = fin_T.join(bs_T, how='left').head(limit - 1)
+
+                revenue = joined['Total Revenue'].to_numpy(dtype='float64')
+                net_income = joined['Net Income'].to_numpy(dtype='float64')
+                total_assets = joined['Total Assets'].to_numpy(dtype='float64')
+                total_equity = joined['Total Stockholder Equity'].to_numpy(dtype='float64')
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    roe = np.where(total_equity != 0, net_income / total_equity * 100, np.nan)
+                    roa = np.where(total_assets != 0, net_income / total_assets * 100, np.nan)
+                    net_margin = np.where(revenue != 0, net_income / revenue * 100, np.nan)
+
+                for date, roe_v, roa_v, nm_v in zip(
+                    joined.index, roe.tolist(), roa.tolist(), net_margin.tolist()
+                ):
                     historical_metric = self._build_historical_financial_metric(
-                        ticker, info, quarterly_financials, quarterly_balance_sheet, 
-                        quarterly_cashflow, date, "quarterly"
+                        ticker, info, date, "quarterly",
+                        roe_v if roe_v == roe_v else None,
+                        roa_v if roa_v == roa_v else None,
+                        nm_v if nm_v == nm_v else None,
                     )
                     if historical_metric:
                         metrics.append(historical_metric)
-            
+
             return metrics[:limit]
         
         try:
@@ -218,25 +349,14 @@ class YahooFinanceProvider(DataProvider):
             return None
     
     def _build_historical_financial_metric(
-        self, ticker: str, info: dict, financials: pd.DataFrame,
-        balance_sheet: pd.DataFrame, cashflow: pd.DataFrame, 
-        date: pd.Timestamp, period: str
+        self, ticker: str, info: dict, date: pd.Timestamp, period: str,
+        roe: Optional[float], roa: Optional[float],
+        net_margin: Optional[float],
     ) -> Optional[FinancialMetrics]:
-        """Build historical FinancialMetrics from Yahoo Finance data."""
+        """Build historical FinancialMetrics from pre-computed ratios."""
         try:
             date_str = date.strftime('%Y-%m-%d')
-            
-            # Extract data from financial statements
-            revenue = financials.loc['Total Revenue', date] if 'Total Revenue' in financials.index else None
-            net_income = financials.loc['Net Income', date] if 'Net Income' in financials.index else None
-            total_assets = balance_sheet.loc['Total Assets', date] if 'Total Assets' in balance_sheet.index else None
-            total_equity = balance_sheet.loc['Total Stockholder Equity', date] if 'Total Stockholder Equity' in balance_sheet.index else None
-            
-            # Calculate basic ratios if data is available
-            roe = (net_income / total_equity * 100) if (net_income and total_equity and total_equity != 0) else None
-            roa = (net_income / total_assets * 100) if (net_income and total_assets and total_assets != 0) else None
-            net_margin = (net_income / revenue * 100) if (net_income and revenue and revenue != 0) else None
-            
+
             return FinancialMetrics(
                 ticker=ticker,
                 report_period=date_str,
@@ -253,7 +373,7 @@ class YahooFinanceProvider(DataProvider):
                 peg_ratio=None,
                 gross_margin=None,
                 operating_margin=None,
-                net_margin=roe,
+                net_margin=net_margin,
                 return_on_equity=roe,
                 return_on_assets=roa,
                 return_on_invested_capital=None,
@@ -328,9 +448,8 @@ class YahooFinanceProvider(DataProvider):
     def get_company_facts(self, ticker: str) -> Optional[CompanyFacts]:
         """Fetch company facts from Yahoo Finance."""
         def _fetch_facts():
-            stock = yf.Ticker(ticker)
-            info = stock.info
-            
+            info = self._get_info(ticker)
+
             if not info:
                 return None
             
@@ -365,8 +484,7 @@ class YahooFinanceProvider(DataProvider):
     def get_market_cap(self, ticker: str, end_date: str) -> Optional[float]:
         """Fetch market capitalization from Yahoo Finance."""
         def _fetch_market_cap():
-            stock = yf.Ticker(ticker)
-            info = stock.info
+            info = self._get_info(ticker)
             return info.get('marketCap') if info else None
         
         try:
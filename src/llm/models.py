@@ -1,5 +1,6 @@
 import os
 import json
+from functools import lru_cache
 from langchain_anthropic import ChatAnthropic
 from langchain_deepseek import ChatDeepSeek
 from langchain_google_genai import ChatGoogleGenerativeAI
@@ -111,8 +112,14 @@ LLM_ORDER = [model.to_choice_tuple() for model in AVAILABLE_MODELS]
 OLLAMA_LLM_ORDER = [model.to_choice_tuple() for model in OLLAMA_MODELS]
 
 
+@lru_cache(maxsize=64)
 def get_model_info(model_name: str, model_provider: str) -> LLMModel | None:
-    """Get model information by model_name"""
+    """Get model information by model_name.
+
+    The model tables are loaded once at import, so the linear scan for a
+    given name/provider pair always resolves the same way; caching it
+    keeps the walk off the per-LLM-call path.
+    """
     all_models = AVAILABLE_MODELS + OLLAMA_MODELS
     return next((model for model in all_models if model.model_name == model_name and model.provider == model_provider), None)
 
@@ -4,10 +4,14 @@ This module maintains backward compatibility while leveraging the new provider m
 """
 
 import datetime
+import functools
 import os
+import numpy as np
 import pandas as pd
 import logging
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from operator import attrgetter
+from typing import Dict, List, Optional
 
 from src.data.provider_manager import DataProviderManager
 from src.data.models import (
@@ -21,22 +25,18 @@ from src.data.models import (
 
 logger = logging.getLogger(__name__)
 
-# Global provider manager instance
-_provider_manager = None
-
 
+@functools.lru_cache(maxsize=1)
 def get_provider_manager() -> DataProviderManager:
     """Get or create the global provider manager instance."""
-    global _provider_manager
-    if _provider_manager is None:
-        # Initialize with API keys from environment
-        financial_datasets_api_key = os.environ.get("FINANCIAL_DATASETS_API_KEY")
-        
-        _provider_manager = DataProviderManager(
-            financial_datasets_api_key=financial_datasets_api_key
-        )
-        logger.info("Initialized DataProviderManager")
-    return _provider_manager
+    # Initialize with API keys from environment
+    financial_datasets_api_key = os.environ.get("FINANCIAL_DATASETS_API_KEY")
+
+    manager = DataProviderManager(
+        financial_datasets_api_key=financial_datasets_api_key
+    )
+    logger.info("Initialized DataProviderManager")
+    return manager
 
 
 # Backward-compatible API functions that now use the provider manager
@@ -61,15 +61,47 @@ def get_prices(ticker: str, start_date: str, end_date: str, api_key: str = None)
         manager = get_provider_manager()
         prices, provider_used = manager.get_prices(ticker, start_date, end_date)
         
-        logger.debug(f"Retrieved {len(prices)} prices for {ticker} from {provider_used}")
+        logger.debug("Retrieved %d prices for %s from %s", len(prices), ticker, provider_used)
         return prices
         
     except Exception as e:
-        logger.error(f"Failed to get prices for {ticker}: {e}")
+        logger.error("Failed to get prices for %s: %s", ticker, e)
         # Return empty list for backward compatibility
         return []
 
 
+def get_prices_many(tickers: List[str], start_date: str, end_date: str, api_key: str = None) -> Dict[str, List[Price]]:
+    """
+    Fetch price data for several tickers concurrently.
+
+    A loop over get_prices pays one round trip per ticker. Issuing the
+    calls concurrently lets the provider manager's price batcher coalesce
+    the cache misses into a single multi-ticker download, so wall time is
+    roughly one round trip regardless of portfolio size. Tickers that
+    fail map to an empty list, matching get_prices error semantics.
+
+    Args:
+        tickers: Stock ticker symbols
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        api_key: Legacy parameter, now handled by provider manager
+
+    Returns:
+        Dict mapping each ticker to its list of Price objects
+    """
+    if not tickers:
+        return {}
+    if len(tickers) == 1:
+        return {tickers[0]: get_prices(tickers[0], start_date, end_date, api_key)}
+
+    with ThreadPoolExecutor(max_workers=min(8, len(tickers))) as executor:
+        futures = {
+            ticker: executor.submit(get_prices, ticker, start_date, end_date, api_key)
+            for ticker in tickers
+        }
+        return {ticker: future.result() for ticker, future in futures.items()}
+
+
 def get_financial_metrics(
     ticker: str,
     end_date: str,
@@ -94,11 +126,11 @@ def get_financial_metrics(
         manager = get_provider_manager()
         metrics, provider_used = manager.get_financial_metrics(ticker, end_date, period, limit)
         
-        logger.debug(f"Retrieved {len(metrics)} financial metrics for {ticker} from {provider_used}")
+        logger.debug("Retrieved %d financial metrics for %s from %s", len(metrics), ticker, provider_used)
         return metrics
         
     except Exception as e:
-        logger.error(f"Failed to get financial metrics for {ticker}: {e}")
+        logger.error("Failed to get financial metrics for %s: %s", ticker, e)
         return []
 
 
@@ -128,11 +160,11 @@ def search_line_items(
         manager = get_provider_manager()
         items, provider_used = manager.search_line_items(ticker, line_items, end_date, period, limit)
         
-        logger.debug(f"Retrieved {len(items)} line items for {ticker} from {provider_used}")
+        logger.debug("Retrieved %d line items for %s from %s", len(items), ticker, provider_used)
         return items
         
     except Exception as e:
-        logger.error(f"Failed to search line items for {ticker}: {e}")
+        logger.error("Failed to search line items for %s: %s", ticker, e)
         return []
 
 
@@ -160,11 +192,11 @@ def get_insider_trades(
         manager = get_provider_manager()
         trades, provider_used = manager.get_insider_trades(ticker, end_date, start_date, limit)
         
-        logger.debug(f"Retrieved {len(trades)} insider trades for {ticker} from {provider_used}")
+        logger.debug("Retrieved %d insider trades for %s from %s", len(trades), ticker, provider_used)
         return trades
         
     except Exception as e:
-        logger.error(f"Failed to get insider trades for {ticker}: {e}")
+        logger.error("Failed to get insider trades for %s: %s", ticker, e)
         return []
 
 
@@ -192,11 +224,11 @@ def get_company_news(
         manager = get_provider_manager()
         news, provider_used = manager.get_company_news(ticker, end_date, start_date, limit)
         
-        logger.debug(f"Retrieved {len(news)} news articles for {ticker} from {provider_used}")
+        logger.debug("Retrieved %d news articles for %s from %s", len(news), ticker, provider_used)
         return news
         
     except Exception as e:
-        logger.error(f"Failed to get company news for {ticker}: {e}")
+        logger.error("Failed to get company news for %s: %s", ticker, e)
         return []
 
 
@@ -221,14 +253,14 @@ def get_market_cap(
         market_cap, provider_used = manager.get_market_cap(ticker, end_date)
         
         if market_cap:
-            logger.debug(f"Retrieved market cap ${market_cap:,.0f} for {ticker} from {provider_used}")
+            logger.debug("Retrieved market cap $%s for %s from %s", format(market_cap, ",.0f"), ticker, provider_used)
         else:
-            logger.debug(f"No market cap available for {ticker}")
+            logger.debug("No market cap available for %s", ticker)
             
         return market_cap
         
     except Exception as e:
-        logger.error(f"Failed to get market cap for {ticker}: {e}")
+        logger.error("Failed to get market cap for %s: %s", ticker, e)
         return None
 
 
@@ -246,17 +278,82 @@ def prices_to_df(prices: List[Price]) -> pd.DataFrame:
     """
     if not prices:
         return pd.DataFrame()
-        
-    df = pd.DataFrame([p.model_dump() for p in prices])
-    df["Date"] = pd.to_datetime(df["time"])
-    df.set_index("Date", inplace=True)
-    numeric_cols = ["open", "close", "high", "low", "volume"]
-    for col in numeric_cols:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
-    df.sort_index(inplace=True)
+
+    # Single price (e.g. latest-close lookups): build the one-row frame
+    # directly instead of going through the columnar machinery
+    if len(prices) == 1:
+        p = prices[0]
+        return pd.DataFrame(
+            {
+                "open": [p.open],
+                "close": [p.close],
+                "high": [p.high],
+                "low": [p.low],
+                "volume": [float(p.volume)],
+                "time": [p.time],
+            },
+            index=pd.DatetimeIndex(pd.to_datetime([p.time]), name="Date"),
+        )
+
+    # Columnar construction: pull attributes straight into arrays instead
+    # of serializing each Price to a per-row dict via model_dump
+    get_row = attrgetter("time", "open", "close", "high", "low", "volume")
+    times, opens, closes, highs, lows, volumes = zip(*map(get_row, prices))
+    df = pd.DataFrame(
+        {
+            "open": np.asarray(opens, dtype="float64"),
+            "close": np.asarray(closes, dtype="float64"),
+            "high": np.asarray(highs, dtype="float64"),
+            "low": np.asarray(lows, dtype="float64"),
+            "volume": np.asarray(volumes, dtype="float64"),
+            "time": times,
+        },
+        index=pd.DatetimeIndex(pd.to_datetime(times, cache=True), name="Date"),
+    )
+    # Providers emit chronological rows, so the sort is usually a no-op;
+    # only pay for it when the index actually arrives out of order
+    if not df.index.is_monotonic_increasing:
+        df.sort_index(inplace=True)
     return df
 
 
+def prices_to_arrays(prices: List[Price]) -> Dict[str, np.ndarray]:
+    """
+    Convert prices to typed numpy arrays, keyed by column.
+
+    Lighter-weight sibling of prices_to_df for numeric consumers that
+    only need a vector (e.g. closes for an indicator) and would
+    otherwise pay for the DataFrame's block manager and DatetimeIndex.
+
+    Args:
+        prices: List of Price objects
+
+    Returns:
+        Dict with float64 arrays for open/close/high/low/volume and a
+        datetime64[D] array for time, all in provider row order
+    """
+    if not prices:
+        return {
+            "open": np.empty(0, dtype="float64"),
+            "close": np.empty(0, dtype="float64"),
+            "high": np.empty(0, dtype="float64"),
+            "low": np.empty(0, dtype="float64"),
+            "volume": np.empty(0, dtype="float64"),
+            "time": np.empty(0, dtype="datetime64[D]"),
+        }
+
+    get_row = attrgetter("time", "open", "close", "high", "low", "volume")
+    times, opens, closes, highs, lows, volumes = zip(*map(get_row, prices))
+    return {
+        "open": np.asarray(opens, dtype="float64"),
+        "close": np.asarray(closes, dtype="float64"),
+        "high": np.asarray(highs, dtype="float64"),
+        "low": np.asarray(lows, dtype="float64"),
+        "volume": np.asarray(volumes, dtype="float64"),
+        "time": np.asarray(times, dtype="datetime64[D]"),
+    }
+
+
 def get_price_data(ticker: str, start_date: str, end_date: str, api_key: str = None) -> pd.DataFrame:
     """
     Get price data as a DataFrame.
@@ -338,46 +435,46 @@ def reset_provider_health(provider_name: str):
 # Legacy cache functions for backward compatibility
 # These now delegate to the provider manager's cache system
 
+class LegacyCacheAdapter:
+    """Adapter to maintain backward compatibility with the old cache interface."""
+
+    def __init__(self, provider_manager):
+        self.manager = provider_manager
+
+    def get_prices(self, cache_key: str) -> list:
+        # Extract parameters from cache key (simplified)
+        return None  # Let provider manager handle caching
+
+    def set_prices(self, cache_key: str, data: list):
+        # Caching is now handled by provider manager
+        pass
+
+    def get_financial_metrics(self, cache_key: str) -> list:
+        return None
+
+    def set_financial_metrics(self, cache_key: str, data: list):
+        pass
+
+    def get_insider_trades(self, cache_key: str) -> list:
+        return None
+
+    def set_insider_trades(self, cache_key: str, data: list):
+        pass
+
+    def get_company_news(self, cache_key: str) -> list:
+        return None
+
+    def set_company_news(self, cache_key: str, data: list):
+        pass
+
+
 def get_cache():
     """
     Get cache instance for backward compatibility.
-    
+
     Note: This returns a simplified interface that delegates to the enhanced cache.
     """
-    class LegacyCacheAdapter:
-        """Adapter to maintain backward compatibility with the old cache interface."""
-        
-        def __init__(self, provider_manager):
-            self.manager = provider_manager
-            
-        def get_prices(self, cache_key: str) -> list:
-            # Extract parameters from cache key (simplified)
-            return None  # Let provider manager handle caching
-            
-        def set_prices(self, cache_key: str, data: list):
-            # Caching is now handled by provider manager
-            pass
-            
-        def get_financial_metrics(self, cache_key: str) -> list:
-            return None
-            
-        def set_financial_metrics(self, cache_key: str, data: list):
-            pass
-            
-        def get_insider_trades(self, cache_key: str) -> list:
-            return None
-            
-        def set_insider_trades(self, cache_key: str, data: list):
-            pass
-            
-        def get_company_news(self, cache_key: str) -> list:
-            return None
-            
-        def set_company_news(self, cache_key: str, data: list):
-            pass
-    
-    manager = get_provider_manager()
-    return LegacyCacheAdapter(manager)
+    return LegacyCacheAdapter(get_provider_manager())
 
 
 # Information functions
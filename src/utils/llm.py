@@ -1,11 +1,78 @@
 """Helper functions for LLM"""
 
 import json
+import logging
+import random
+import re
+import time
+from functools import lru_cache
 from pydantic import BaseModel
 from src.llm.models import get_model, get_model_info
 from src.utils.progress import progress
 from src.graph.state import AgentState
 
+logger = logging.getLogger(__name__)
+
+
+def _ensure_debug_visible():
+    """
+    Make debug dumps actually reach the terminal.
+
+    Nothing in the CLI path configures logging, so Python's last-resort
+    handler would drop everything below WARNING and --debug would print
+    nothing. When the debug flag is set, give this logger its own DEBUG
+    stderr handler instead of relying on app-wide configuration.
+    """
+    if logger.getEffectiveLevel() > logging.DEBUG:
+        logger.setLevel(logging.DEBUG)
+    if not logger.handlers:
+        logger.addHandler(logging.StreamHandler())
+        # The dedicated handler emits everything; don't also bubble up to
+        # whatever the embedding app configured, or dumps print twice
+        logger.propagate = False
+
+# Code-block patterns for extract_json_from_response, compiled once
+# instead of on every LLM response
+_JSON_BLOCK_PATTERNS = [
+    re.compile(pattern, re.DOTALL | re.IGNORECASE)
+    for pattern in (
+        r'```json\s*\n?(.*?)```',  # Standard ```json
+        r'```jsonc\s*\n?(.*?)```',  # JSON with comments
+        r'```[a-z]*json[a-z]*\s*\n?(.*?)```',  # Malformed json blocks (e.g., jsoncjsonc)
+        r'```\s*\n?(\{.*?\})\s*```',  # Generic code blocks with JSON content
+    )
+]
+
+# Reused by the bare-object fallback in extract_json_from_response
+_JSON_DECODER = json.JSONDecoder()
+
+# LLM responses are frequently kilobytes of JSON; orjson parses them
+# noticeably faster than stdlib json when it is available
+try:
+    import orjson
+
+    def _loads(text: str):
+        return orjson.loads(text)
+except ImportError:  # pragma: no cover - depends on environment
+    def _loads(text: str):
+        return json.loads(text)
+
+
+@lru_cache(maxsize=128)
+def _structured_llm(model_name, model_provider, api_keys_token, pydantic_model):
+    """
+    Build (once) a structured-output LLM for a model/schema combination.
+
+    with_structured_output re-derives the JSON schema from the pydantic
+    model and rebuilds the runnable pipeline on every call; the result
+    only depends on the arguments here, so it is cached across calls.
+    """
+    api_keys = dict(api_keys_token) if api_keys_token else None
+    return get_model(model_name, model_provider, api_keys).with_structured_output(
+        pydantic_model,
+        method="json_mode",
+    )
+
 
 def call_llm(
     prompt: any,
@@ -46,85 +113,85 @@ def call_llm(
             api_keys = request.api_keys
 
     model_info = get_model_info(model_name, model_provider)
-    llm = get_model(model_name, model_provider, api_keys)
-    
+    has_json_mode = not (model_info and not model_info.has_json_mode())
+
     # Check if debug mode is enabled
     debug_enabled = False
     if state and state.get("metadata", {}).get("debug", False):
         debug_enabled = True
+        _ensure_debug_visible()
 
     # For non-JSON support models, we can use structured output
-    if not (model_info and not model_info.has_json_mode()):
-        llm = llm.with_structured_output(
-            pydantic_model,
-            method="json_mode",
-        )
+    if has_json_mode:
+        try:
+            api_keys_token = tuple(sorted(api_keys.items())) if api_keys else None
+            llm = _structured_llm(model_name, model_provider, api_keys_token, pydantic_model)
+        except TypeError:
+            # Unhashable key material; fall back to building it per call
+            llm = get_model(model_name, model_provider, api_keys).with_structured_output(
+                pydantic_model,
+                method="json_mode",
+            )
+    else:
+        llm = get_model(model_name, model_provider, api_keys)
 
-    # Print debug information if enabled
+    # Log debug information if enabled; built as one message so parallel
+    # agent threads don't interleave their dumps line by line
     if debug_enabled:
-        print("=" * 80)
-        print("🐛 DEBUG MODE ENABLED - LLM PROMPT")
-        print("=" * 80)
-        print(f"Agent: {agent_name}")
-        print(f"Model: {model_name} ({model_provider})")
-        print(f"Has JSON mode: {not (model_info and not model_info.has_json_mode())}")
-        print(f"Attempt: 1/{max_retries}")
-        print("-" * 80)
-        print("PROMPT:")
-        print("-" * 40)
-        
+        lines = [
+            "🐛 DEBUG MODE ENABLED - LLM PROMPT",
+            f"Agent: {agent_name}",
+            f"Model: {model_name} ({model_provider})",
+            f"Has JSON mode: {has_json_mode}",
+            f"Attempt: 1/{max_retries}",
+            "PROMPT:",
+        ]
+
         # Handle different prompt formats
         if hasattr(prompt, 'messages') and prompt.messages:
             # ChatPromptTemplate with messages
             for i, message in enumerate(prompt.messages):
                 role = getattr(message, 'type', 'unknown')
                 content = getattr(message, 'content', str(message))
-                print(f"Message {i+1} ({role}):")
-                print(content)
-                print("-" * 20)
+                lines.append(f"Message {i+1} ({role}):")
+                lines.append(content)
         elif hasattr(prompt, 'to_string'):
             # Prompt object with to_string method
-            print(prompt.to_string())
+            lines.append(prompt.to_string())
         elif hasattr(prompt, 'content'):
             # Message with content attribute
-            print(prompt.content)
+            lines.append(prompt.content)
         else:
             # Fallback - convert to string
-            print(str(prompt))
-        
-        print("-" * 40)
-        print("=" * 80)
-    
+            lines.append(str(prompt))
+
+        logger.debug("\n".join(lines))
+
     # Call the LLM with retries
     for attempt in range(max_retries):
         try:
-            # Print retry information if debug enabled and not first attempt
+            # Log retry information if debug enabled and not first attempt
             if debug_enabled and attempt > 0:
-                print(f"🔄 DEBUG: Retry attempt {attempt + 1}/{max_retries}")
-            
+                logger.debug("🔄 DEBUG: Retry attempt %d/%d", attempt + 1, max_retries)
+
             # Call the LLM
             result = llm.invoke(prompt)
-            
-            # Print debug response if enabled
+
+            # Log debug response if enabled
             if debug_enabled:
-                print("=" * 80)
-                print("🐛 DEBUG - LLM RESPONSE")
-                print("=" * 80)
-                print(f"Response type: {type(result)}")
+                lines = ["🐛 DEBUG - LLM RESPONSE", f"Response type: {type(result)}"]
                 if hasattr(result, 'content'):
-                    print("Raw content:")
-                    print("-" * 40)
-                    print(repr(result.content))  # Show escaped version
-                    print("-" * 40)
-                    print("Formatted content:")
-                    print(result.content)
+                    lines.append("Raw content:")
+                    lines.append(repr(result.content))  # Show escaped version
+                    lines.append("Formatted content:")
+                    lines.append(result.content)
                 else:
-                    print("Response:")
-                    print(result)
-                print("=" * 80)
+                    lines.append("Response:")
+                    lines.append(str(result))
+                logger.debug("\n".join(lines))
 
             # For non-JSON support models, we need to extract and parse the JSON manually
-            if model_info and not model_info.has_json_mode():
+            if not has_json_mode:
                 parsed_result = extract_json_from_response(result.content)
                 if parsed_result:
                     return pydantic_model(**parsed_result)
@@ -139,42 +206,57 @@ def call_llm(
                 progress.update_status(agent_name, None, f"Error - retry {attempt + 1}/{max_retries}")
 
             if attempt == max_retries - 1:
-                error_msg = f"Error in LLM call after {max_retries} attempts: {e}"
-                print("=" * 80)
-                print("LLM CALL FAILED - DEBUGGING INFO")
-                print("=" * 80)
-                print(f"Error: {error_msg}")
-                print(f"Agent: {agent_name}")
-                print(f"Model: {model_name} ({model_provider})")
-                print(f"Has JSON mode: {not (model_info and not model_info.has_json_mode())}")
-                
+                lines = [
+                    "LLM CALL FAILED - DEBUGGING INFO",
+                    f"Error: Error in LLM call after {max_retries} attempts: {e}",
+                    f"Agent: {agent_name}",
+                    f"Model: {model_name} ({model_provider})",
+                    f"Has JSON mode: {has_json_mode}",
+                ]
+
                 # Show the raw LLM response if it exists and we're dealing with JSON parsing
                 if hasattr(e, '__traceback__') and 'result' in locals():
-                    print(f"\nRAW LLM RESPONSE:")
-                    print("-" * 40)
+                    lines.append("RAW LLM RESPONSE:")
                     if hasattr(result, 'content'):
-                        print(repr(result.content))  # Use repr to show escapes/special chars
-                        print("-" * 40)
-                        print("FORMATTED RESPONSE:")
-                        print(result.content)
+                        lines.append(repr(result.content))  # Use repr to show escapes/special chars
+                        lines.append("FORMATTED RESPONSE:")
+                        lines.append(result.content)
                     else:
-                        print(f"Result type: {type(result)}")
-                        print(f"Result: {result}")
-                    print("-" * 40)
-                
-                print("=" * 80)
-                
+                        lines.append(f"Result type: {type(result)}")
+                        lines.append(f"Result: {result}")
+
+                logger.error("\n".join(lines))
+
+
                 # Use default_factory if provided, otherwise create a basic default
                 if default_factory:
                     return default_factory()
                 return create_default_response(pydantic_model)
 
+            # Rate-limited providers recover with time, and retrying a
+            # nondeterministic completion immediately tends to hit the
+            # same limiter; back off exponentially with a little jitter
+            time.sleep(min(2 ** attempt * 0.5, 8.0) + random.uniform(0, 0.25))
+
     # This should never be reached due to the retry logic above
     return create_default_response(pydantic_model)
 
 
+# Default kwargs per model class for create_default_response; the field
+# reflection only depends on the class, so it runs once per schema
+_DEFAULTS_CACHE: dict[type[BaseModel], dict] = {}
+
+
 def create_default_response(model_class: type[BaseModel]) -> BaseModel:
     """Creates a safe default response based on the model's fields."""
+    defaults = _DEFAULTS_CACHE.get(model_class)
+    if defaults is None:
+        defaults = _DEFAULTS_CACHE.setdefault(model_class, _compute_defaults(model_class))
+    return model_class(**defaults)
+
+
+def _compute_defaults(model_class: type[BaseModel]) -> dict:
+    """Derive the per-field default values used by create_default_response."""
     default_values = {}
     for field_name, field in model_class.model_fields.items():
         if field.annotation == str:
@@ -192,7 +274,7 @@ def create_default_response(model_class: type[BaseModel]) -> BaseModel:
             else:
                 default_values[field_name] = None
 
-    return model_class(**default_values)
+    return default_values
 
 
 def extract_json_from_response(content: str) -> dict | None:
@@ -206,67 +288,41 @@ def extract_json_from_response(content: str) -> dict | None:
     - Plain JSON without code blocks
     - JSON with extra whitespace/characters
     """
-    import re
-    
     try:
         # Method 1: Try various code block patterns (most common)
-        patterns = [
-            r'```json\s*\n?(.*?)```',  # Standard ```json
-            r'```jsonc\s*\n?(.*?)```',  # JSON with comments
-            r'```[a-z]*json[a-z]*\s*\n?(.*?)```',  # Malformed json blocks (e.g., jsoncjsonc)
-            r'```\s*\n?(\{.*?\})\s*```',  # Generic code blocks with JSON content
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, content, re.DOTALL | re.IGNORECASE)
+        for pattern in _JSON_BLOCK_PATTERNS:
+            match = pattern.search(content)
             if match:
                 json_text = match.group(1).strip()
                 if json_text:
-                    return json.loads(json_text)
+                    return _loads(json_text)
         
-        # Method 2: Look for JSON object boundaries without code blocks
-        # Find the first { and last } that form a valid JSON object
+        # Method 2: Look for a JSON object without code blocks. raw_decode
+        # parses from the first brace in C and finds the object's end
+        # itself, replacing the Python char-by-char brace count and the
+        # second pass json.loads used to make over the slice.
         first_brace = content.find('{')
         if first_brace != -1:
-            # Find the matching closing brace by counting braces
-            brace_count = 0
-            for i, char in enumerate(content[first_brace:], first_brace):
-                if char == '{':
-                    brace_count += 1
-                elif char == '}':
-                    brace_count -= 1
-                    if brace_count == 0:
-                        json_text = content[first_brace:i+1]
-                        return json.loads(json_text)
-        
-        # Method 3: Try to extract lines that look like JSON
-        lines = content.split('\n')
-        json_lines = []
-        in_json = False
-        
-        for line in lines:
-            line = line.strip()
-            if line.startswith('{') or in_json:
-                in_json = True
-                json_lines.append(line)
-                if line.endswith('}') and line.count('}') >= line.count('{'):
-                    json_text = '\n'.join(json_lines)
-                    try:
-                        return json.loads(json_text)
-                    except:
-                        continue
-        
+            obj, _ = _JSON_DECODER.raw_decode(content, first_brace)
+            return obj
+
     except Exception as e:
-        print(f"JSON EXTRACTION DEBUG:")
-        print(f"Error: {e}")
-        print(f"Content length: {len(content)}")
-        print(f"Content preview (first 300 chars):")
-        print(repr(content[:300]))
-        print(f"Content preview (formatted):")
-        print(content[:300])
+        lines = [
+            "JSON EXTRACTION DEBUG:",
+            f"Error: {e}",
+            f"Content length: {len(content)}",
+            "Content preview (first 300 chars):",
+            repr(content[:300]),
+            "Content preview (formatted):",
+            content[:300],
+        ]
         if len(content) > 300:
-            print(f"... (truncated, total length: {len(content)} chars)")
-    
+            lines.append(f"... (truncated, total length: {len(content)} chars)")
+        # Warning level: this diagnostic fired unconditionally before the
+        # move to logging, and warnings survive the last-resort handler
+        # even when nothing configures logging
+        logger.warning("\n".join(lines))
+
     return None
 
 
@@ -275,22 +331,41 @@ def get_agent_model_config(state, agent_name):
     Get model configuration for a specific agent from the state.
     Falls back to global model configuration if agent-specific config is not available.
     Always returns valid model_name and model_provider values.
+
+    The resolved config is cached on the state's metadata dict, so the
+    request walk and enum conversion run once per agent per workflow
+    rather than on every LLM call.
     """
-    request = state.get("metadata", {}).get("request")
-    
+    metadata = state.get("metadata", {})
+    cache = metadata.get("_model_config_cache")
+    if cache is None and isinstance(metadata, dict):
+        cache = metadata.setdefault("_model_config_cache", {})
+    if cache is not None:
+        cached = cache.get(agent_name)
+        if cached is not None:
+            return cached
+
+    request = metadata.get("request")
+
+    resolved = None
     if request and hasattr(request, 'get_agent_model_config'):
         # Get agent-specific model configuration
         model_name, model_provider = request.get_agent_model_config(agent_name)
         # Ensure we have valid values
         if model_name and model_provider:
-            return model_name, model_provider.value if hasattr(model_provider, 'value') else str(model_provider)
-    
-    # Fall back to global configuration (system defaults)
-    model_name = state.get("metadata", {}).get("model_name") or "gpt-4.1"
-    model_provider = state.get("metadata", {}).get("model_provider") or "OPENAI"
-    
-    # Convert enum to string if necessary
-    if hasattr(model_provider, 'value'):
-        model_provider = model_provider.value
-    
-    return model_name, model_provider
+            resolved = model_name, model_provider.value if hasattr(model_provider, 'value') else str(model_provider)
+
+    if resolved is None:
+        # Fall back to global configuration (system defaults)
+        model_name = metadata.get("model_name") or "gpt-4.1"
+        model_provider = metadata.get("model_provider") or "OPENAI"
+
+        # Convert enum to string if necessary
+        if hasattr(model_provider, 'value'):
+            model_provider = model_provider.value
+
+        resolved = model_name, model_provider
+
+    if cache is not None:
+        cache[agent_name] = resolved
+    return resolved